@@ -0,0 +1,185 @@
+"""
+Runs the benchmark suite: parses the generated sentences (see benchmark/generators.py) with the generated grammars,
+repeating the empty shifts (the sentences need several empty heads), and records, for each case, the time to load the
+grammar, the wall time, the configurations popped, the peak memory and the derivations found; then compares them with
+the stored baseline. The configurations and the derivations are compared by default; the times and the memory depend
+on the machine, so they are only compared on request, with a baseline saved on the same machine.
+
+Usage (from the repository root):
+    python -m benchmark.bench                 # run and compare with benchmark/baseline.json
+    python -m benchmark.bench --save          # run and store the results as the new baseline
+    python -m benchmark.bench --engine queue  # benchmark another search engine
+    python -m benchmark.bench --resources --repeat 3 --baseline local.json  # also compare the times and the memory
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import NamedTuple
+
+from benchmark.generators import FAMILIES, SentenceGenerator, generate_grammar, write_grammar
+from grammar.mg import MG
+from lc.lc_parser import LCParser
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+GRAMMAR_SIZES = [4, 64, 512]  # words per category
+AMBIGUITIES = [0, 1, 2]  # extra lexical items per verb
+# the sentence sizes of each family by ambiguity: embedding depth, coordinated clauses, wh-movement depth. Each level
+# needs another empty head and the search grows exponentially with them: size 3 takes minutes, as does size 2 of the
+# ambiguous embedding and coordination
+SENTENCE_SIZES = {
+    0: {'embedding': [0, 1, 2], 'coordination': [1, 2], 'wh': [1, 2]},
+    1: {'embedding': [0, 1], 'coordination': [1], 'wh': [1, 2]},
+    2: {'embedding': [0, 1], 'coordination': [1], 'wh': [1, 2]},
+}
+# the sentences from this size on only run with the smallest grammar: the size of the lexicon changes the time to load
+# the grammar, not the configurations of a parse
+LARGE_SENTENCE = 2
+EMPTY_SHIFTS = 'repeat'  # the sentences need the same empty head more than once
+TIME_SLACK = 0.005  # seconds a case may always exceed its baseline time by (timer noise on the fast cases)
+
+
+class Case(NamedTuple):
+    size: int
+    ambiguity: int
+    family: str
+    depth: int
+
+    @property
+    def name(self) -> str:
+        return f"g{self.size}a{self.ambiguity}/{self.family}{self.depth}"
+
+
+def get_cases() -> list[Case]:
+    return [Case(size, ambiguity, family, depth)
+            for size in GRAMMAR_SIZES for ambiguity in AMBIGUITIES
+            for family, depths in SENTENCE_SIZES[ambiguity].items() for depth in depths
+            if depth < LARGE_SENTENCE or size == GRAMMAR_SIZES[0]]
+
+
+def run_case(parser: LCParser, sentence: list[str], engine: str, repeat: int, memory: bool) -> dict:
+    """
+    Parses the sentence repeat times (keeping the best wall time), then once more under tracemalloc for the peak memory.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results, _, config_count = parser.parse_with_status(sentence, engine=engine, empty_shifts=EMPTY_SHIFTS)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    stats = {
+        'length': len(sentence),
+        'time': round(best, 6),
+        'configurations': config_count,
+        'derivations': len(results),
+    }
+    if memory:
+        tracemalloc.start()
+        parser.parse(sentence, engine=engine, empty_shifts=EMPTY_SHIFTS)
+        stats['peak_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+    return stats
+
+
+def run(engine='stack', repeat=1, memory=True) -> dict[str, dict]:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for case in get_cases():
+            grammar, vocabulary = generate_grammar(case.size, case.ambiguity)
+            path = os.path.join(directory, f"g{case.size}a{case.ambiguity}.json")
+            write_grammar(grammar, path)
+            # a new parser per case, so no case benefits from the rules compiled by another
+            start = time.perf_counter()
+            parser = LCParser(MG(path))
+            load_time = time.perf_counter() - start
+            sentence = SentenceGenerator(vocabulary, seed=case.depth).generate(case.family, case.depth)
+            results[case.name] = {'load_time': round(load_time, 6)} | run_case(parser, sentence, engine, repeat, memory)
+            print(f"{case.name:<24} {format_stats(results[case.name])}")
+    return results
+
+
+def format_stats(stats: dict) -> str:
+    memory = f"{stats['peak_kb']:>10.1f} KB" if 'peak_kb' in stats else ''
+    return (f"{stats['load_time'] * 1000:>9.2f} ms load {stats['time'] * 1000:>10.2f} ms "
+            f"{stats['configurations']:>8} configs {stats['derivations']:>6} derivations{memory}")
+
+
+def check_parses(results: dict[str, dict]) -> list[str]:
+    """
+    Every case is a grammatical sentence: a case without derivations measures a search failing early.
+    :return: The cases without derivations, as messages.
+    """
+    return [f"{name}: no derivations" for name, stats in results.items() if stats['derivations'] == 0]
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float, resources=False) -> list[str]:
+    """
+    Compares the results with the baseline.
+    The derivations must not change and the configurations must not grow. With resources, the times and the memory
+    may also grow by the tolerance (a fraction), as they are noisy (the times also by TIME_SLACK).
+    :return: The regressions found, as messages.
+    """
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if stats['derivations'] != old['derivations']:
+            regressions.append(f"{name}: {old['derivations']} -> {stats['derivations']} derivations")
+        if stats['configurations'] > old['configurations']:
+            regressions.append(f"{name}: {old['configurations']} -> {stats['configurations']} configurations")
+        if not resources:
+            continue
+        for measure in ('load_time', 'time'):
+            if measure in old and stats[measure] > max(old[measure] * (1 + tolerance), old[measure] + TIME_SLACK):
+                regressions.append(f"{name}: {measure} {old[measure]} -> {stats[measure]}")
+        if 'peak_kb' in stats and 'peak_kb' in old and stats['peak_kb'] > old['peak_kb'] * (1 + tolerance):
+            regressions.append(f"{name}: peak_kb {old['peak_kb']} -> {stats['peak_kb']}")
+    return regressions
+
+
+def main(args=None) -> int:
+    arg_parser = argparse.ArgumentParser(description='Benchmarks the lc parser on generated grammars and sentences.')
+    arg_parser.add_argument('--engine', default='stack', help='the search engine (default: stack)')
+    arg_parser.add_argument('--repeat', type=int, default=1, help='runs per case, the best time is kept (default: 1)')
+    arg_parser.add_argument('--no-memory', action='store_true', help='skip the (slower) peak memory measurement')
+    arg_parser.add_argument('--baseline', default=BASELINE, help='the baseline JSON file')
+    arg_parser.add_argument('--save', action='store_true', help='store the results as the new baseline')
+    arg_parser.add_argument('--resources', action='store_true',
+                            help='also compare the times and the memory (with a baseline saved on this machine)')
+    arg_parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='the fraction by which the time and memory may exceed the baseline (default: 0.5)')
+    options = arg_parser.parse_args(args)
+
+    results = run(options.engine, options.repeat, not options.no_memory)
+    failures = check_parses(results)
+    for failure in failures:
+        print(f"FAILURE {failure}")
+
+    if options.save:
+        if failures:
+            print("Not saving a baseline with failed cases")
+            return 1
+        with open(options.baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved the baseline to {options.baseline}")
+        return 0
+    if not os.path.exists(options.baseline):
+        print(f"No baseline at {options.baseline}, run with --save to create it")
+        return 0
+
+    with open(options.baseline) as file:
+        baseline = json.load(file)
+    regressions = failures + compare(results, baseline, options.tolerance, options.resources)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regressions against {options.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Generates the synthetic workloads of the benchmark: MG lexicons of growing size (in the style of input/g1.json) and
+sentences of growing length, embedding depth, coordination and wh-movement.
+"""
+import json
+import random
+
+RULES = [
+    "shift",
+    "lc1(merge1)",
+    "c1(lc2(merge2))",
+    "c1(lc1(merge1))",
+    "lc2(merge3)",
+    "c3(lc2(merge2))",
+    "c(shift)",
+    "c(lc1(move1))",
+    "lc2(merge2)",
+]
+
+
+class Vocabulary:
+    """
+    The words of a generated grammar, by category.
+    """
+
+    def __init__(self, size: int):
+        self.names = [f"name{i}" for i in range(size)]  # d
+        self.transitives = [f"likes{i}" for i in range(size)]  # =d,=d,v
+        self.embedders = [f"knows{i}" for i in range(size)]  # =c,=d,v
+        self.wh_words = [f"what{i}" for i in range(max(1, size // 4))]  # d,-wh
+
+
+def generate_grammar(size: int, ambiguity=0) -> tuple[dict, Vocabulary]:
+    """
+    Generates a grammar with size words of each (open) category.
+    :param size: The number of names, transitive verbs and clause-embedding verbs.
+    :param ambiguity: The number of extra (homonym) lexical items of each verb: 1 adds an intransitive item
+                      (=d,v for transitive verbs, =c,v for embedding ones), 2 also adds a clause-selecting item to the
+                      transitive verbs (=c,=d,v).
+    :return: The grammar (in the JSON format of MG) and its vocabulary.
+    """
+    vocabulary = Vocabulary(size)
+    lexicon = {"": ["=v,c", "=v,+wh,c"], "and": ["=c,=c,c"]}
+    for name in vocabulary.names:
+        lexicon[name] = ["d"]
+    for wh in vocabulary.wh_words:
+        lexicon[wh] = ["d,-wh"]
+    for verb in vocabulary.transitives:
+        lexicon[verb] = ["=d,=d,v", "=d,v", "=c,=d,v"][:1 + ambiguity]
+    for verb in vocabulary.embedders:
+        lexicon[verb] = ["=c,=d,v", "=c,v"][:1 + min(ambiguity, 1)]
+    return {"lexicon": lexicon, "rules": RULES, "startCategory": "c"}, vocabulary
+
+
+def write_grammar(grammar: dict, path: str):
+    with open(path, 'w') as file:
+        json.dump(grammar, file, indent=2)
+
+
+class SentenceGenerator:
+    """
+    Generates the sentences of each family from a vocabulary, picking the words with a seeded random generator so the
+    workloads are the same on every run.
+    """
+
+    def __init__(self, vocabulary: Vocabulary, seed=0):
+        self.vocabulary = vocabulary
+        self.random = random.Random(seed)
+
+    def pick(self, words: list[str]) -> str:
+        return self.random.choice(words)
+
+    def clause(self) -> list[str]:
+        """
+        A transitive clause: name likes name.
+        """
+        v = self.vocabulary
+        return [self.pick(v.names), self.pick(v.transitives), self.pick(v.names)]
+
+    def embedding(self, depth: int) -> list[str]:
+        """
+        A clause embedded under depth clause-embedding verbs: name knows name knows ... name likes name.
+        """
+        v = self.vocabulary
+        words = []
+        for _ in range(depth):
+            words += [self.pick(v.names), self.pick(v.embedders)]
+        return words + self.clause()
+
+    def coordination(self, count: int) -> list[str]:
+        """
+        count + 1 coordinated clauses: clause and clause and ... clause.
+        """
+        words = self.clause()
+        for _ in range(count):
+            words += ['and'] + self.clause()
+        return words
+
+    def wh_movement(self, depth: int) -> list[str]:
+        """
+        An embedded question whose wh-word moves out of depth - 1 further embedded clauses:
+        name knows what name knows ... name likes.
+        """
+        v = self.vocabulary
+        words = [self.pick(v.names), self.pick(v.embedders), self.pick(v.wh_words)]
+        for _ in range(depth - 1):
+            words += [self.pick(v.names), self.pick(v.embedders)]
+        return words + [self.pick(v.names), self.pick(v.transitives)]
+
+    def generate(self, family: str, size: int) -> list[str]:
+        return FAMILIES[family](self, size)
+
+
+FAMILIES = {
+    'embedding': SentenceGenerator.embedding,
+    'coordination': SentenceGenerator.coordination,
+    'wh': SentenceGenerator.wh_movement,
+}
@@ -0,0 +1,45 @@
+import json
+import os
+
+import pytest
+
+from grammar.mg import MG
+from lc.lc_parser import LCParser
+
+G1 = os.path.join(os.path.dirname(__file__), 'input', 'g1.json')
+
+
+@pytest.fixture(scope='session')
+def g1():
+    return MG(G1)
+
+
+@pytest.fixture
+def parser(g1):
+    return LCParser(g1)
+
+
+@pytest.fixture
+def input1():
+    return ['Aca', 'knows', 'what', 'Bibi', 'likes']
+
+
+@pytest.fixture
+def input2():
+    return ['Bibi', 'likes', 'Aca']
+
+
+@pytest.fixture
+def input3():
+    return ['Aca', 'likes', 'Bibi', 'and', 'Bibi', 'likes', 'Aca']
+
+
+@pytest.fixture(scope='session')
+def ambiguous_parser(tmp_path_factory):
+    # every derivation shifting Aca is doubled, and the two items reach the same configurations, which are merged
+    with open(G1) as file:
+        grammar = json.load(file)
+    grammar['lexicon']['Aca'] = ['d', 'd']
+    path = tmp_path_factory.mktemp('grammar') / 'ambiguous.json'
+    path.write_text(json.dumps(grammar))
+    return LCParser(MG(str(path)))
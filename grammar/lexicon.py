@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Feature:
     feature: str
     prefix: str = ''
@@ -45,7 +45,7 @@ class LexItem:
         :param features: The features as a concatenated string (e.g., '=v,+wh,c')
         """
         self.element: str = element
-        self.features: list[Feature] = parse_features(features)
+        self.features: tuple[Feature, ...] = tuple(parse_features(features))
 
     def get_last_index(self, f: Feature):
         try:
@@ -1,27 +1,84 @@
 """
 Defines the minimalist grammar object
 """
+import hashlib
 import json
+import os
+import pickle
 
 from grammar.lexicon import LexItem, Feature
+from lc.lc_configuration import FEATURE_PLACEHOLDER
 from lc.lc_rule import LCRule
 
+CACHE_SUFFIX = '.mgc'  # the compiled grammar is cached next to its JSON file (g1.json -> g1.json.mgc)
+CACHE_VERSION = 1  # bump when the precomputed structures change, to invalidate the existing caches
+
 
 class MG:
-    def __init__(self, input_file):
+    def __init__(self, input_file, cache=False):
         """
         Initializes the grammar object with the given input file
         :param input_file: The grammar description file in JSON format
+        :param cache: Load the compiled grammar (with all of its precomputed structures) from the cache next to the
+                      input file when it is fresh (same content hash), and write it otherwise. The cache is a pickle,
+                      so only enable it for grammars in directories you trust (see load_cache()).
         """
         self.lexicon: list[LexItem] = []  # a mapping between an element and its features
         self.rules: list[LCRule] = []  # a list of LC rules
         self.start_category: Feature = None
-        self.link_relations: dict[str, str] = {}
+        self.link_relations: dict[tuple[str, ...], frozenset[str]] = {}
+        self.lexicon_index: dict[str, list[LexItem]] = {}  # element -> all of its lexical items
+        self.selector_gammas: dict[str, list[Feature]] = {}  # selectee -> features that follow its selector
+        self.empty_items: list[LexItem] = []  # lexical items of the empty element
 
         # Parse the JSON file
-        with open(input_file, 'r') as file:
-            data = json.load(file)
-        self.parse_json(data)
+        with open(input_file, 'rb') as file:
+            content = file.read()
+        digest = hashlib.sha256(content).hexdigest()
+        cache_file = input_file + CACHE_SUFFIX
+        if cache and self.load_cache(cache_file, digest):
+            return
+        self.parse_json(json.loads(content))
+        self.build_indexes()
+        self.compute_link_relations()
+        if cache:
+            self.save_cache(cache_file, digest)
+
+    def load_cache(self, cache_file, digest) -> bool:
+        """
+        Loads the compiled grammar from the cache file (one bulk read), if it was compiled from the same content.
+        Unpickling can run arbitrary code, so the cache is only loaded when it is owned by the current user and not
+        writable by anyone else (as save_cache() writes it).
+        :return: True if the grammar was loaded, False if the cache is missing, stale, unreadable or not trusted.
+        """
+        try:
+            with open(cache_file, 'rb') as file:
+                status = os.fstat(file.fileno())
+                if hasattr(os, 'getuid') and (status.st_uid != os.getuid() or status.st_mode & 0o022):
+                    return False
+                cached = pickle.loads(file.read())
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return False
+        if not isinstance(cached, dict) or cached.get('version') != CACHE_VERSION or cached.get('hash') != digest:
+            return False
+        self.__dict__.update(cached['grammar'])
+        return True
+
+    def save_cache(self, cache_file, digest):
+        """
+        Writes the compiled grammar to the cache file (readable by its owner only); a grammar in a read-only location
+        is just not cached. The file is replaced atomically, so concurrent processes never read a partial cache.
+        """
+        data = pickle.dumps({'version': CACHE_VERSION, 'hash': digest, 'grammar': self.__dict__},
+                            protocol=pickle.HIGHEST_PROTOCOL)
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as file:
+                file.write(data)
+            os.replace(temp_file, cache_file)
+        except OSError:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
 
     def parse_json(self, data):
         """
@@ -37,20 +94,112 @@ class MG:
 
         self.start_category = Feature(data.get('startCategory'))
 
+    def build_indexes(self):
+        """
+        Builds the lookup tables used during parsing, so no rule has to scan the whole lexicon.
+        """
+        for lex in self.lexicon:
+            self.lexicon_index.setdefault(lex.element, []).append(lex)
+            if lex.element == '':
+                self.empty_items.append(lex)
+
+            # the feature right after the last selector of each selectee (see LCParser.lc2_merge2)
+            for f in {f.feature for f in lex.features if f.is_selector()}:
+                ind = lex.get_last_index(Feature(f, '='))
+                if ind + 1 < len(lex.features):
+                    gammas = self.selector_gammas.setdefault(f, [])
+                    if lex.features[ind + 1] not in gammas:
+                        gammas.append(lex.features[ind + 1])
+
     def get_lexicon_item(self, element):
         """
         Returns the lexical item with the given element
         :param element: The element to search for
-        :return: The lexical item with the given element; None if not found
+        :return: The (first) lexical item with the given element; None if not found
         """
-        for lex in self.lexicon:
-            if lex.element == element:
-                return lex
-        return None
+        items = self.lexicon_index.get(element)
+        return items[0] if items else None
+
+    def get_lexicon_items(self, element) -> list[LexItem]:
+        """
+        Returns all the lexical items with the given element (an ambiguous word has several)
+        :param element: The element to search for
+        :return: A list of lexical items; empty if not found
+        """
+        return self.lexicon_index.get(element, [])
+
+    def get_gammas(self, selectee) -> list[Feature]:
+        """
+        Returns the features that can follow a selector of the given feature in the lexicon
+        :param selectee: The selected feature (e.g., 'd' for '=d')
+        :return: A list of features, in lexicon order
+        """
+        return self.selector_gammas.get(selectee, [])
 
     def __str__(self):
         return f"Lexicon: {self.lexicon}\nRules: {self.rules}"
 
     def compute_link_relations(self):
-        raise NotImplementedError()
+        """
+        Computes the left-corner link table used by the parser's oracle.
+        Maps every feature sequence a prediction can carry (a suffix of some lexical item's features, possibly
+        cut short by the '_Fs' placeholder) to the set of elements that can be the first word of such an expression.
+        The empty element ('') is in the set when the whole expression can be empty, so any next word is possible.
+        """
+        items = [(lex.element, [str(f) for f in lex.features]) for lex in self.lexicon]
+        suffixes: dict[tuple[str, ...], list[tuple[int, int]]] = {}
+        licensees: dict[str, list[tuple[int, int]]] = {}
+        moving: set[str] = set()  # categories that are followed by a licensee, i.e. may leave an empty trace
+        for i, (_, fs) in enumerate(items):
+            for k in range(len(fs)):
+                suffixes.setdefault(tuple(fs[k:]), []).append((i, k))
+                if fs[k].startswith('-'):
+                    licensees.setdefault(fs[k][1:], []).append((i, k))
+                    if k > 0 and not fs[k - 1].startswith(('=', '+', '-')):
+                        moving.add(fs[k - 1])
+        corners = {(i, k): set() for i, (_, fs) in enumerate(items) for k in range(len(fs))}
+
+        def selected(f):
+            # the left corners of a selected complement/specifier with category f
+            found = set().union(*(corners[ik] for ik in suffixes.get((f,), [])))
+            return found | {''} if f in moving else found
+
+        def moved(f):
+            # the left corners of a mover landing on +f
+            return set().union(*(corners[ik] for ik in licensees.get(f, [])))
+
+        changed = True
+        while changed:
+            changed = False
+            for (i, k), current in corners.items():
+                element, fs = items[i]
+                # the head comes first, unless it is empty and has already taken its complement
+                head = {element}
+                if k > 0 and fs[0].startswith('=') and element == '':
+                    head = selected(fs[0][1:])
+                found, nullable = head - {''}, '' in head
+                # anything merged or moved to a specifier position precedes the head
+                for f in fs[1:k]:
+                    if f.startswith('='):
+                        spec = selected(f[1:])
+                    elif f.startswith('+'):
+                        spec = moved(f[1:])
+                    else:
+                        continue
+                    found |= spec - {''}
+                    nullable = nullable and '' in spec
+                if nullable:
+                    found.add('')
+                if not found <= current:
+                    current |= found
+                    changed = True
+
+        link_relations: dict[tuple[str, ...], set[str]] = {}
+        for (i, k), found in corners.items():
+            fs = items[i][1]
+            link_relations.setdefault(tuple(fs[k:]), set()).update(found)
+            for j in range(k, len(fs) + 1):
+                key = tuple(fs[k:j]) + (str(FEATURE_PLACEHOLDER),)
+                link_relations.setdefault(key, set()).update(found)
+        self.link_relations = {key: frozenset(found) for key, found in link_relations.items()}
 
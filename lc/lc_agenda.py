@@ -0,0 +1,203 @@
+"""
+Defines the agendas of the lc parser: the nodes waiting to be expanded, and the visited table used to merge equivalent
+configurations.
+1. StackAgenda: the depth-first search over a single stack (the default engine).
+2. QueueAgenda: the breadth-first search over a FIFO queue.
+3. PriorityAgenda: a best-first search, always expanding the node with the highest score.
+4. BeamAgenda: an approximate, column by column search, keeping only the best nodes entering each input position.
+The scores are given by a scoring function over the nodes (see progress()); an engine is selected by name, or given as
+a factory of agendas, e.g. functools.partial(BeamAgenda, width=4, score=my_score).
+"""
+import heapq
+from bisect import insort
+from collections import deque
+from itertools import count
+from typing import Callable
+
+from lc.lc_derivation import Derivation
+
+DEFAULT_BEAM_WIDTH = 32
+
+
+def progress(node: Derivation) -> float:
+    """
+    The default score: the progress through the input, minus the number of pending queue elements.
+    A scoring function gets the node (node.config is its configuration, node.parents[0][1] the last applied rule).
+    """
+    return node.config.current_pos - len(node.config.queue)
+
+
+def rule_weights(weights: dict[str, float]) -> Callable[[Derivation], float]:
+    """
+    Returns a scoring function summing the weights (e.g., learned) of the rules applied to reach a node, by rule string.
+    Costs O(derivation length) per node.
+    """
+    def score(node: Derivation) -> float:
+        return sum(weights.get(str(rule), 0.0) for rule in node.get_rules())
+
+    return score
+
+
+class Agenda:
+    def __init__(self):
+        self.visited: dict[tuple, Derivation] = {}
+
+    def lookup(self, key: tuple) -> Derivation:
+        """
+        Returns the node already reached with the given key; None if there is none.
+        """
+        return self.visited.get(key)
+
+    def push(self, key: tuple, node: Derivation):
+        raise NotImplementedError()
+
+    def pop(self) -> Derivation:
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        raise NotImplementedError()
+
+
+class StackAgenda(Agenda):
+    def __init__(self):
+        super().__init__()
+        self.stack: list[Derivation] = []
+
+    def push(self, key: tuple, node: Derivation):
+        self.visited[key] = node
+        self.stack.append(node)
+
+    def pop(self) -> Derivation:
+        return self.stack.pop()
+
+    def __len__(self):
+        return len(self.stack)
+
+    def __iter__(self):
+        return iter(self.stack)
+
+
+class QueueAgenda(Agenda):
+    def __init__(self):
+        super().__init__()
+        self.queue: deque[Derivation] = deque()
+
+    def push(self, key: tuple, node: Derivation):
+        self.visited[key] = node
+        self.queue.append(node)
+
+    def pop(self) -> Derivation:
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __iter__(self):
+        return iter(self.queue)
+
+
+class PriorityAgenda(Agenda):
+    """
+    Ties are broken by the push order (first pushed, first popped).
+    """
+
+    def __init__(self, score: Callable[[Derivation], float] = progress):
+        super().__init__()
+        self.score = score
+        self.heap: list[tuple[float, int, Derivation]] = []
+        self.order = count()
+
+    def push(self, key: tuple, node: Derivation):
+        self.visited[key] = node
+        heapq.heappush(self.heap, (-self.score(node), next(self.order), node))
+
+    def pop(self) -> Derivation:
+        return heapq.heappop(self.heap)[2]
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __iter__(self):
+        return (node for _, _, node in sorted(self.heap))
+
+
+class BeamAgenda(Agenda):
+    """
+    Keeps at most width configurations entering each input position (after a shift), the best ones (by score); the
+    others are dropped (and forgotten, so an equivalent configuration reached later competes again). The steps that do
+    not consume input (lc, composition, empty shifts) from the kept configurations are all searched, best first.
+    The positions are expanded in order: configurations only move forward in the input, so all the configurations
+    entering a position are known before it is expanded, and once it is done none of its configurations can be reached
+    again. The search is approximate, but only width configurations per position start a search of its steps.
+    """
+
+    def __init__(self, width: int = DEFAULT_BEAM_WIDTH, score: Callable[[Derivation], float] = progress):
+        super().__init__()
+        self.width = width
+        self.score = score
+        self.columns: dict[int, list[tuple]] = {}  # position -> nodes waiting to be expanded
+        self.charts: dict[int, dict[tuple, Derivation]] = {}  # position -> visited nodes
+        self.current_pos = 0
+        self.size = 0
+        self.order = count()
+
+    def lookup(self, key: tuple) -> Derivation:
+        chart = self.charts.get(key[0])  # the key starts with the position
+        return chart.get(key) if chart else None
+
+    def push(self, key: tuple, node: Derivation):
+        # the columns hold (score, -order, key, node), sorted so the best node is the last one
+        pos = node.config.current_pos
+        column = self.columns.setdefault(pos, [])
+        entry = (self.score(node), -next(self.order), key, node)
+        if pos > self.current_pos and len(column) >= self.width:
+            # the column of a later position only holds the configurations entering it
+            if entry[:2] <= column[0][:2]:
+                return  # not better than the worst configuration entering this position
+            self.charts[pos].pop(column.pop(0)[2], None)
+            self.size -= 1
+        self.charts.setdefault(pos, {})[key] = node
+        insort(column, entry, key=lambda e: e[:2])
+        self.size += 1
+
+    def pop(self) -> Derivation:
+        column = self.columns.get(self.current_pos)
+        while not column:
+            self.columns.pop(self.current_pos, None)
+            self.charts.pop(self.current_pos, None)
+            self.current_pos += 1
+            column = self.columns.get(self.current_pos)
+        self.size -= 1
+        return column.pop()[3]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for pos in sorted(self.columns):
+            yield from (entry[3] for entry in self.columns[pos])
+
+
+AGENDAS = {
+    'stack': StackAgenda,
+    'queue': QueueAgenda,
+    'best': PriorityAgenda,
+    'beam': BeamAgenda,
+}
+
+
+def make_agenda(engine) -> Agenda:
+    """
+    Returns a new agenda for the engine: the name of one of the AGENDAS, or a factory of agendas.
+    """
+    if callable(engine):
+        return engine()
+    if engine not in AGENDAS:
+        raise ValueError(f"Unknown engine: {engine}, expected one of {list(AGENDAS)} or a factory of agendas")
+    return AGENDAS[engine]()
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from grammar.lexicon import Feature
 
 UNKNOWN_POS = 99  # replaces '_' position from the paper, will be printed as '_'
@@ -7,20 +7,24 @@ FEATURE_PLACEHOLDER = Feature('_Fs')
 CHAIN_PLACEHOLDER = '_M'
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Expression:
+    """
+    An immutable expression, rules build new expressions that share the unchanged parts of the old ones.
+    Equality and hashing are structural, matching the unknown parts is done with unifies() and match().
+    """
     left: int = UNKNOWN_POS  # left position
     right: int = UNKNOWN_POS  # right position
     stype: str = UNKNOWN_STYPE  # : or ::
-    features: list[Feature] = None
-    movers: list['Expression'] = None
+    features: tuple[Feature, ...] = ()
+    movers: tuple['Expression', ...] = ()
 
     def __str__(self):
         if self.stype == '_M':
             return f"{self.stype}"
         left_str = '_' if self.left == UNKNOWN_POS else self.left
         right_str = '_' if self.right == UNKNOWN_POS else self.right
-        exp_str = f"({left_str}-{right_str}{self.stype} {self.features}"
+        exp_str = f"({left_str}-{right_str}{self.stype} [{', '.join(str(f) for f in self.features)}]"
 
         if self.movers:
             for m in self.movers:
@@ -40,17 +44,23 @@ class Expression:
 
     def features_equal(self, other):
         return (self.features == other.features) or \
-            (self.features[0] == FEATURE_PLACEHOLDER) or (other.features[0] == FEATURE_PLACEHOLDER)
+            (bool(self.features) and self.features[0] == FEATURE_PLACEHOLDER) or \
+            (bool(other.features) and other.features[0] == FEATURE_PLACEHOLDER)
 
     def is_chain_place(self):
         return self.stype == CHAIN_PLACEHOLDER
 
     def movers_equal(self, other):
         # TODO: make sure to handle empty movers list?
-        return (self.movers == other.movers) or \
-            (self.movers[0].is_chain_place()) or (other.movers[0].is_chain_place())
-
-    def __eq__(self, other):
+        return (len(self.movers) == len(other.movers) and
+                all(m.unifies(o) for m, o in zip(self.movers, other.movers))) or \
+            (bool(self.movers) and self.movers[0].is_chain_place()) or \
+            (bool(other.movers) and other.movers[0].is_chain_place())
+
+    def unifies(self, other):
+        """
+        Whether the two expressions can be matched, unknown positions, stypes and placeholders match anything.
+        """
         return self.pos_equal(self.left, other.left) and \
             self.pos_equal(self.right, other.right) and \
             self.stype_equal(other) and \
@@ -75,16 +85,24 @@ class Expression:
     def has_mover_placeholder(self):
         return self.get_mover_place_index() > -1
 
-    def match(self, other, feat=True, mover=True):
-        self.left = other.left if self.left == UNKNOWN_POS else self.left
-        self.right = other.right if self.right == UNKNOWN_POS else self.right
+    def match(self, other, feat=True, mover=True) -> 'Expression':
+        """
+        Fills the unknown parts (positions, placeholders) of this expression from the other expression.
+        :return: The matched expression; self if nothing was unknown.
+        """
+        changes = {}
+        if self.left == UNKNOWN_POS and other.left != UNKNOWN_POS:
+            changes['left'] = other.left
+        if self.right == UNKNOWN_POS and other.right != UNKNOWN_POS:
+            changes['right'] = other.right
         if self.has_feature_placeholder() and feat:
-            self.features = self.features[:self.get_feat_place_index()] + other.features
+            changes['features'] = self.features[:self.get_feat_place_index()] + other.features
         if self.has_mover_placeholder() and mover:
-            self.movers = self.movers[:self.get_mover_place_index()] + other.movers
+            changes['movers'] = self.movers[:self.get_mover_place_index()] + other.movers
+        return replace(self, **changes) if changes else self
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Term:
     exp: Expression
     output_exp: Expression = None
@@ -99,3 +117,116 @@ class Term:
 
     def __repr__(self):
         return str(self)
+
+
+class Queue:
+    """
+    A persistent (cons) list of terms, the first term is the focus.
+    Pushing and popping the focus are O(1) and share the rest of the queue with the original one.
+    """
+    __slots__ = ('head', 'tail', 'size', 'arrows', '_hash', '_left_index', '_right_index')
+
+    def __init__(self, head: Term = None, tail: 'Queue' = None):
+        self.head: Term = head
+        self.tail: Queue = tail
+        self.size: int = 0 if tail is None else tail.size + 1
+        # the number of (A => B) terms in the queue
+        self.arrows: int = 0 if tail is None else tail.arrows + (not head.is_single())
+        self._hash: int = None  # computed on demand, shared tails keep theirs
+        self._left_index: dict = None  # side indexes of the (A => B) terms, see get_index()
+        self._right_index: dict = None
+
+    def push(self, term: Term) -> 'Queue':
+        return Queue(term, self)
+
+    def remove(self, index: int) -> 'Queue':
+        """
+        Returns the queue without the term at the given index, only the cells before it are rebuilt.
+        """
+        prefix = []
+        cell = self
+        for _ in range(index):
+            prefix.append(cell.head)
+            cell = cell.tail
+        cell = cell.tail
+        for term in reversed(prefix):
+            cell = Queue(term, cell)
+        return cell
+
+    def get_index(self, left=True) -> dict[tuple[Feature, str], tuple['Queue', ...]]:
+        """
+        The side index of the (A => B) terms in the queue: maps the first feature and the stype of their left (or right)
+        side to the cells holding them, in queue order.
+        Built on demand and cached, each cell extends the index of its tail (which is shared with other queues).
+        """
+        attr = '_left_index' if left else '_right_index'
+        pending = []
+        cell = self
+        while cell.size and getattr(cell, attr) is None:
+            pending.append(cell)
+            cell = cell.tail
+        index = getattr(cell, attr) if cell.size else {}
+
+        for cell in reversed(pending):
+            term = cell.head
+            if not term.is_single():
+                side = term.exp if left else term.output_exp
+                key = (side.features[0] if side.features else None, side.stype)
+                index = dict(index)
+                index[key] = (cell,) + index.get(key, ())
+            setattr(cell, attr, index)
+        return index
+
+    def candidates(self, exp: Expression, left=True):
+        """
+        Yields (index, term) for the (A => B) terms whose left (or right) side may unify with exp, in queue order.
+        Only the first feature and the stype are checked, the caller still has to unify the candidates.
+        """
+        f = exp.features[0] if exp.features else None
+        any_features = f == FEATURE_PLACEHOLDER
+        any_stype = exp.stype == UNKNOWN_STYPE
+        cells = []
+        for (side_f, side_stype), side_cells in self.get_index(left).items():
+            if (any_features or side_f == f or side_f == FEATURE_PLACEHOLDER) and \
+                    (any_stype or side_stype == exp.stype or side_stype == UNKNOWN_STYPE):
+                cells.extend(side_cells)
+        # a larger size is closer to the focus
+        cells.sort(key=lambda c: -c.size)
+        for cell in cells:
+            yield self.size - cell.size, cell.head
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __iter__(self):
+        cell = self
+        while cell.size:
+            yield cell.head
+            cell = cell.tail
+
+    def __eq__(self, other):
+        if not isinstance(other, Queue):
+            return NotImplemented
+        a, b = self, other
+        while a is not b:  # a shared tail is equal
+            if a.size != b.size or a.head != b.head:
+                return False
+            a, b = a.tail, b.tail
+        return True
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self.head, self.tail)) if self.size else 0
+        return self._hash
+
+    def __str__(self):
+        return f"[{', '.join(str(term) for term in self)}]"
+
+    def __repr__(self):
+        return str(self)
+
+
+EMPTY_QUEUE = Queue()
@@ -0,0 +1,238 @@
+"""
+Defines the derivation (search) nodes of the lc parser.
+Each node points to its parents and to the rules that were applied to them, so the derivation history is shared between
+all the configurations that extend it, instead of being copied on every push.
+A node has more than one parent when equivalent configurations, reached by different derivations, were merged.
+Nodes also point to their children, so the derivations completed by a late merge can be found without a new search.
+"""
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from lc.lc_rule import LCRule
+
+if TYPE_CHECKING:
+    from lc.lc_parser import Configuration
+
+
+@dataclass(slots=True, eq=False)
+class Derivation:
+    config: 'Configuration'
+    parents: list[tuple['Derivation', LCRule]] = field(default_factory=list)  # (parent node, applied rule)
+    children: list[tuple[LCRule, 'Derivation']] = field(default_factory=list)  # (applied rule, child node)
+    depth: int = 0  # number of applied rules (in the first derivation reaching this node)
+    empty_shifts: frozenset = frozenset()  # the empty-shift rules excluded from the rest of the derivation (see extend())
+    empty_count: int = 0  # the number of empty shifts applied so far
+    after_shift: bool = False  # the last applied rule is a shift rule
+    success: bool = False  # the configuration was accepted as a successful one
+    productive: bool = False  # a successful node is reachable from this node
+
+    def extend(self, config, rule: LCRule, empty_scope='derivation') -> 'Derivation':
+        """
+        Returns the node reached by applying the rule to this node, with the new configuration.
+        The node is not linked as a child until it is added to the search (see link()).
+        :param empty_scope: How long an applied empty-shift rule is excluded: 'derivation' (it is applied at most once),
+                            'position' (until the next word is consumed), or None (it may be repeated, the number of
+                            empty shifts is bounded by the caller).
+        """
+        empty_shifts, empty_count = self.empty_shifts, self.empty_count
+        if empty_scope == 'position' and config.current_pos != self.config.current_pos:
+            empty_shifts = frozenset()
+        if rule.is_empty_shift():
+            empty_count += 1
+            if empty_scope is not None:
+                empty_shifts = empty_shifts | {rule}
+        return Derivation(config, [(self, rule)], [], self.depth + 1, empty_shifts, empty_count, rule.is_shift())
+
+    def resume(self, config) -> 'Derivation':
+        """
+        Returns a copy of this (unexpanded) node with another configuration at the same position, e.g. once the next
+        word of a stream is known: it is reached by the same derivations, but is not linked as a child of their nodes.
+        """
+        return Derivation(config, list(self.parents), [], self.depth, self.empty_shifts, self.empty_count,
+                          self.after_shift)
+
+    def link(self):
+        """
+        Links a new node as the child of its (single) parent.
+        """
+        parent, rule = self.parents[0]
+        parent.children.append((rule, self))
+
+    def get_key(self) -> tuple:
+        """
+        The canonical key of the node: two nodes with the same key have the same future derivations.
+        The remaining input is left out, as it is determined by the position within a parse.
+        """
+        return self.config.current_pos, self.config.queue, self.empty_shifts, self.empty_count, self.after_shift
+
+    def merge(self, parent: 'Derivation', rule: LCRule):
+        """
+        Records another derivation reaching this node: applying the rule to the parent.
+        """
+        self.parents.append((parent, rule))
+        parent.children.append((rule, self))
+        if self.productive:
+            parent.mark_productive()
+
+    def mark_success(self):
+        self.success = True
+        self.mark_productive()
+
+    def mark_productive(self):
+        """
+        Marks this node and all of its ancestors as leading to a successful node.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.productive:
+                continue
+            node.productive = True
+            stack.extend(parent for parent, _ in node.parents)
+
+    def get_rules(self) -> list[LCRule]:
+        """
+        Rebuilds the list of applied rules of the first derivation reaching this node.
+        """
+        rules = []
+        node = self
+        while node.parents:
+            node, rule = node.parents[0]
+            rules.append(rule)
+        rules.reverse()
+        return rules
+
+    def iter_rules(self):
+        """
+        Enumerates the lists of applied rules of all the derivations reaching this node.
+        """
+        # each entry holds a node and the (linked) rules applied after it
+        stack = [(self, None)]
+        while stack:
+            node, suffix = stack.pop()
+            if not node.parents:
+                rules = []
+                while suffix is not None:
+                    rule, suffix = suffix
+                    rules.append(rule)
+                yield rules
+                continue
+            for parent, rule in reversed(node.parents):
+                stack.append((parent, (rule, suffix)))
+
+    def iter_suffixes(self):
+        """
+        Enumerates the successful nodes reachable from this node, with the lists of rules applied to reach them.
+        """
+        # each entry holds a node and the (linked) rules applied before it, from this node
+        stack = [(self, None)]
+        while stack:
+            node, prefix = stack.pop()
+            if node.success:
+                rules = []
+                while prefix is not None:
+                    rule, prefix = prefix
+                    rules.append(rule)
+                rules.reverse()
+                yield node, rules
+            for rule, child in reversed(node.children):
+                if child.productive:
+                    stack.append((child, (rule, prefix)))
+
+    def __str__(self):
+        return f"Config: {self.config}, Rules: {self.get_rules()}"
+
+
+class DerivationForest:
+    """
+    The packed forest of the successful derivations of a parse: the successful nodes, with the derivation DAG leading
+    to them. The derivations sharing a prefix (or merged into an equivalent configuration) share its nodes, so the
+    forest may hold exponentially many derivations; they are counted and picked by index without being built.
+    Derivations are ordered by successful node, then as enumerated by Derivation.iter_rules().
+    """
+
+    def __init__(self, successes: list[Derivation], status=None):
+        """
+        :param successes: The successful nodes.
+        :param status: Why the search stopped (a ParseStatus): the forest of a search stopped by its budget is partial.
+        """
+        self.successes = successes
+        self.status = status
+        self._counts: dict[int, int] = {}  # id(node) -> number of derivations reaching the node
+        self._prune()
+
+    def _prune(self):
+        """
+        Drops the children that lead to no successful node, so the rest of the search can be garbage collected.
+        """
+        seen = set()
+        stack = list(self.successes)
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            node.children = [(rule, child) for rule, child in node.children if child.productive]
+            stack.extend(parent for parent, _ in node.parents)
+
+    def count_node(self, node: Derivation) -> int:
+        """
+        The number of derivations reaching the node (a sum over its parents, memoized).
+        """
+        counts = self._counts
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if id(current) in counts:
+                stack.pop()
+                continue
+            missing = [parent for parent, _ in current.parents if id(parent) not in counts]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            counts[id(current)] = sum(counts[id(parent)] for parent, _ in current.parents) if current.parents else 1
+        return counts[id(node)]
+
+    def count(self) -> int:
+        """
+        The number of successful derivations (may exceed sys.maxsize, hence no __len__).
+        """
+        return sum(self.count_node(success) for success in self.successes)
+
+    def get(self, index: int) -> tuple['Configuration', list[LCRule]]:
+        """
+        Returns the successful derivation at the index (as the successful configuration and the applied rules),
+        following the parents by their numbers of derivations.
+        """
+        if index < 0:
+            raise IndexError(f"Derivation index out of range: {index}")
+        for success in self.successes:
+            count = self.count_node(success)
+            if index >= count:
+                index -= count
+                continue
+            rules = []
+            node = success
+            while node.parents:
+                for parent, rule in node.parents:
+                    count = self.count_node(parent)
+                    if index < count:
+                        break
+                    index -= count
+                rules.append(rule)
+                node = parent
+            rules.reverse()
+            return success.config, rules
+        raise IndexError("Derivation index out of range")
+
+    def __iter__(self):
+        for success in self.successes:
+            for rules in success.iter_rules():
+                yield success.config, rules
+
+    def __bool__(self):
+        return bool(self.successes)
+
+    def __str__(self):
+        return f"Forest: {len(self.successes)} successful configurations, {self.count()} derivations"
@@ -0,0 +1,200 @@
+"""
+Defines the incremental interface of the lc parser: the words of a sentence are fed one at a time (e.g., as a tokenizer
+streams them), and the search advances as far as each word allows, keeping its frontier between the calls.
+The frontier holds the configurations that consumed all the words fed so far, waiting for the next one; their
+derivations are kept in the derivation DAG, so the parses of the sentence are rebuilt as parse() does.
+Only the next word is ever kept as remaining input: the configurations of the frontier wait on PENDING.
+parse_shared() parses a batch of sentences this way, feeding the prefixes they share once.
+"""
+import copy
+from dataclasses import replace
+from typing import NamedTuple
+
+from lc.lc_agenda import Agenda, make_agenda
+from lc.lc_configuration import EMPTY_QUEUE
+from lc.lc_derivation import Derivation
+from lc.lc_parser import LCParser, Budget, Configuration, ParseStatus, PENDING
+from lc.lc_rule import LCRule
+
+
+class PrefixStatus(NamedTuple):
+    viable: bool  # some configuration consumed all the words fed so far (the prefix may still be completed)
+    complete: bool  # the words fed so far form a complete sentence; None if not checked
+    frontier: int  # the number of configurations waiting for the next word
+    status: ParseStatus  # COMPLETE, or the limit of the budget that stopped the search (the frontier is then partial)
+
+
+class IncrementalParser:
+    def __init__(self, parser: LCParser, rules: list[LCRule] = None, engine='stack', budget: Budget = None,
+                 check_complete=True, empty_shifts='once', expected: list[list[str]] = None):
+        """
+        :param parser: The parser to parse with.
+        :param rules: Optional parsing rules, replacing the default ones.
+        :param engine: The search engine (see LCParser.parse()).
+        :param budget: Optional resource limits, for the whole stream (the timeout starts now).
+        :param check_complete: After each word, also search for a complete parse of the words fed so far (an extra
+                               search from the frontier, to the end of the input).
+        :param empty_shifts: As in LCParser.parse(). The words to come are unknown, so 'repeat' only bounds each
+                             empty-shift rule to once per position (missing the derivations repeating it there, and the
+                             frontier may grow exponentially), unless the expected sentences are given.
+        :param expected: Optional sentences the stream is one of: the repeated empty shifts are bounded by what any of
+                         them can support (see LCParser.get_empty_support()); the stream must not be fed other words.
+        """
+        self.parser = parser
+        self.engine = engine
+        self.check_complete = check_complete
+        self.context = parser.new_context(None, rules, budget=budget, empty_shifts=empty_shifts)
+        if expected and self.context.max_empty_shifts is not None:
+            self.expect(expected, rules, empty_shifts)
+        self.words: list[str] = []
+        self.frontier: list[Derivation] = [Derivation(Configuration(0, (PENDING,), EMPTY_QUEUE))]
+
+    def expect(self, sentences: list[list[str]], rules: list[LCRule], empty_shifts):
+        """
+        Bounds the repeated empty shifts of the context by the sentences: a category can be headed from a position on if
+        it can in any of them, and a derivation has at most the largest of their bounds.
+        """
+        context = self.context
+        support: list[frozenset] = []
+        bound = 0
+        for sentence in sentences:
+            context.empty_selects, sentence_support, sentence_bound = self.parser.get_empty_support(
+                sentence, rules or self.parser.parsing_rules)
+            for pos, categories in enumerate(sentence_support):
+                if pos < len(support):
+                    support[pos] |= categories
+                else:
+                    support.append(categories)
+            bound = max(bound, sentence_bound)
+        context.empty_support = tuple(support)
+        if empty_shifts == 'repeat':
+            context.max_empty_shifts = bound
+            context.empty_scope = None
+
+    def feed(self, word: str) -> PrefixStatus:
+        """
+        Feeds the next word: expands the frontier until every configuration has consumed it (or died).
+        :return: Whether the prefix is still viable and whether it is a complete sentence.
+        """
+        stack = self.resume((word, PENDING))
+        self.words.append(word)
+        frontier = []
+        for _ in self.run(stack, frontier):
+            pass  # no configuration can be successful before the end of the input
+        self.frontier = frontier
+        status = self.context.status or ParseStatus.COMPLETE
+        complete = None
+        if self.check_complete:
+            complete = bool(frontier) and status is ParseStatus.COMPLETE and next(self.iter_results(), None) is not None
+        if self.parser.trace:
+            self.parser.logger.info(f"Fed word No.{len(self.words)} {word!r}: {len(frontier)} configurations wait")
+        return PrefixStatus(bool(frontier), complete, len(frontier), status)
+
+    def fork(self) -> 'IncrementalParser':
+        """
+        Returns a copy of the parser at this point of the stream, to be fed other words. The copies share the frontier
+        (its nodes are resumed as new nodes, see resume()) and the parse context.
+        """
+        fork = copy.copy(self)
+        fork.words = list(self.words)
+        return fork
+
+    def iter_results(self):
+        """
+        Ends the input after the words fed so far (the stream can still be fed afterwards).
+        :return: A generator of the successful configurations and the applied rules, as parse_iter().
+        """
+        return self.parser.iter_derivations(self.run(self.resume(())))
+
+    def results(self) -> list:
+        """
+        Ends the input after the words fed so far, as iter_results().
+        :return: A list of successful configurations and the applied rules, as parse().
+        """
+        return list(self.iter_results())
+
+    def resume(self, remaining_input: tuple) -> Agenda:
+        """
+        Returns a new agenda holding the frontier, now followed by the given input. The oracle check of the last
+        element pushed to each configuration, passed on PENDING, is redone on the actual next word.
+        """
+        stack = make_agenda(self.engine)
+        pos = len(self.words)
+        for node in self.frontier:
+            queue = node.config.queue
+            if queue and not self.parser.oracle_ok(queue.head, pos, remaining_input):
+                continue
+            node = node.resume(replace(node.config, remaining_input=remaining_input))
+            stack.push(node.get_key(), node)
+        return stack
+
+    def run(self, stack: Agenda, frontier: list = None):
+        """
+        Runs the search over the agenda, as LCParser.search() does (a generator of the same events).
+        :param frontier: If given, the configurations that consumed all the words fed are moved to it, not expanded.
+        """
+        context, parser = self.context, self.parser
+        pos = len(self.words)
+        context.status = None
+        if parser.stats is not None:
+            parser.stats.searches += 1
+        while stack:
+            if context.budget is not None:
+                context.status = parser.check_budget(context, stack)
+                if context.status is not None:
+                    return
+            node = stack.pop()
+            if frontier is not None and node.config.current_pos == pos:
+                frontier.append(node)
+                continue
+            context.config_count += 1
+            if parser.stats is not None:
+                parser.stats.record_pop(len(stack) + 1, len(node.config.queue))
+            yield from parser.expand(node, stack, context)
+
+
+class TrieNode:
+    __slots__ = ('children', 'ends')
+
+    def __init__(self):
+        self.children: dict[str, TrieNode] = {}
+        self.ends: list[int] = []  # the indices of the sentences ending here
+
+
+def build_trie(sentences: list[list[str]]) -> TrieNode:
+    root = TrieNode()
+    for index, sentence in enumerate(sentences):
+        node = root
+        for word in sentence:
+            node = node.children.setdefault(word, TrieNode())
+        node.ends.append(index)
+    return root
+
+
+def parse_shared(parser: LCParser, sentences: list[list[str]], rules: list[LCRule] = None, engine='stack',
+                 empty_shifts='once') -> list:
+    """
+    Parses the sentences, searching the prefixes they share once: the sentences are arranged in a trie of their words,
+    and the frontier of the search is forked where they diverge. A prefix that is no longer viable is not extended.
+    :param empty_shifts: As in LCParser.parse(); repeated empty shifts are bounded by what any of the sentences can
+                         support.
+    :return: The results of each sentence (as returned by parse()), in the order of the sentences.
+    """
+    results = [[] for _ in sentences]
+    incremental = IncrementalParser(parser, rules, engine, check_complete=False, empty_shifts=empty_shifts,
+                                    expected=sentences)
+    stack = [(build_trie(sentences), incremental)]
+    while stack:
+        trie, incremental = stack.pop()
+        if trie.ends:
+            sentence_results = incremental.results()
+            for index in trie.ends:
+                results[index] = list(sentence_results)
+        for word, child in trie.children.items():
+            fork = incremental.fork() if len(trie.children) > 1 else incremental
+            if fork.feed(word).viable:
+                stack.append((child, fork))
+    if parser.trace:
+        config_count = incremental.context.config_count
+        parser.logger.info(f"Parsed {len(sentences)} sentences after {config_count} configurations.")
+    return results
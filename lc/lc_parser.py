@@ -1,23 +1,46 @@
 """
 Defines the lc parser object
 """
-from copy import deepcopy
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from itertools import islice
 from loguru import logger
-from typing import List
+from time import perf_counter
+from typing import Callable, NamedTuple
 
-from grammar.lexicon import Feature, parse_features
+from grammar.lexicon import Feature, LexItem
 from grammar.mg import MG
-from lc.lc_rule import LCRule
+from lc.lc_rule import LCRule, LCKind, InnerKind, CompKind
 from lc.lc_configuration import *
+from lc.lc_derivation import Derivation, DerivationForest
+from lc.lc_agenda import Agenda, make_agenda
+from lc.lc_stats import ParseStats, CONDITION, COMPOSITION, ORACLE, SKIPPED
 
 CHAIN_EXPRESSION = Expression(stype=CHAIN_PLACEHOLDER)
-Queue = List[Term]
+NODE_BYTES = 1024  # the approximate memory of a derivation node (with its configuration), for Budget.max_memory
 
 
-@dataclass
+class Pending:
+    """
+    Stands for the next word of a stream, not known yet (see lc/lc_incremental.py): no word can be shifted from it,
+    and the oracle lets any prediction through.
+    """
+
+    def __repr__(self):
+        return '...'
+
+
+PENDING = Pending()
+
+
+@dataclass(frozen=True, slots=True)
 class Configuration:
     current_pos: int
-    remaining_input: list[str]
+    remaining_input: tuple[str, ...]
     queue: Queue
 
     def get_queue_string(self):
@@ -25,65 +48,272 @@ class Configuration:
         return f"§{elements}§"
 
     def __str__(self):
-        return f"Pos:{self.current_pos},\tInput: {self.remaining_input},\tQueue:{self.get_queue_string()}"
+        return f"Pos:{self.current_pos},\tInput: {list(self.remaining_input)},\tQueue:{self.get_queue_string()}"
+
+
+class ParseStatus(Enum):
+    COMPLETE = 'complete'  # the search was exhausted
+    STOPPED = 'stopped'  # the caller stopped the search (e.g., max_results)
+    TIMEOUT = 'timeout'
+    MAX_CONFIGS = 'max_configs'
+    MAX_STACK = 'max_stack'
+    MAX_MEMORY = 'max_memory'
+
+
+@dataclass(frozen=True, slots=True)
+class Budget:
+    """
+    The resource limits of a parse, None for no limit. A parse hitting a limit stops, keeping the derivations found.
+    """
+    timeout: float = None  # wall time, in seconds
+    max_configs: int = None  # popped configurations
+    max_stack: int = None  # configurations waiting in the stack (agenda)
+    max_memory: int = None  # approximate memory of the search, in bytes (NODE_BYTES per reached configuration)
+
+
+class ParseResult(NamedTuple):
+    results: list  # the successful configurations and the applied rules (found before the search stopped)
+    status: ParseStatus
+    config_count: int  # the number of popped configurations
+
+
+class BatchResult(NamedTuple):
+    index: int  # the index of the sentence in the batch
+    sentence: list[str]
+    results: list  # the successful configurations and the applied rules, as returned by parse()
+    error: str = None  # the last error, if the sentence failed (after all retries)
+
+
+class FocusSignature(NamedTuple):
+    """
+    The parts of a configuration that decide which rules can apply to it.
+    """
+    focus: str  # 'single', 'arrow' or None for an empty queue
+    stype: str = None  # of a single focus
+    prefix: str = None  # of the first feature of a single focus, None if it has no features
+    licensee: bool = False  # the second feature of a single focus is a licensee
+    movers: bool = False  # a single focus has movers
+    rest_arrows: bool = False  # the queue after the focus has an (A => B) term
+    arrows: bool = False  # the queue has an (A => B) term
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRule:
+    """
+    A rule bound to the parser functions applying its parts, so applying it needs no dispatch on its kinds.
+    """
+    rule: LCRule
+    lc: Callable = None  # applies the lc part to the focus: lc(parser, exp, var); None for shift rules
+    comp: Callable = None  # applies the composition part: comp(parser, result, queue); None if not a comp rule
+    shift: bool = False
+    empty_shift: bool = False
+    gammas: bool = False  # the rule is applied once per gamma (lc2(merge2))
+
+    def admits(self, sig: FocusSignature) -> bool:
+        """
+        Whether the rule can apply to a configuration with the given signature, mirroring the conditions checked by
+        the functions applying it (this only rules out applications that are bound to fail).
+        """
+        rule = self.rule
+        if self.shift:
+            # c(shift) composes with an (A => B) in the queue
+            return self.comp is None or sig.arrows
+
+        if sig.focus != 'single' or sig.prefix is None:
+            return False
+        if rule.kind is LCKind.LC1 and rule.inner is InnerKind.MERGE1:
+            applies = sig.stype == '::' and sig.prefix == '=' and not sig.movers
+        elif rule.kind is LCKind.LC1 and rule.inner is InnerKind.MOVE1:
+            applies = sig.movers and sig.prefix == '+'
+        elif rule.kind is LCKind.LC2 and rule.inner is InnerKind.MERGE3:
+            applies = sig.licensee
+        else:
+            applies = True
+
+        if self.comp is None or not applies:
+            return applies
+        # lc1(move1) completes an expression, the other lc rules predict one (A => B)
+        single_result = rule.inner is InnerKind.MOVE1
+        if (rule.comp is CompKind.C) != single_result:
+            return False
+        return sig.rest_arrows
+
+    def __str__(self):
+        return str(self.rule)
+
+    def __repr__(self):
+        return str(self)
+
+
+@dataclass(slots=True)
+class ParseContext:
+    """
+    The state of a single parse (call), so one parser (and its grammar) can serve repeated and concurrent calls.
+    """
+    rules: tuple[CompiledRule, ...]  # the parsing rules of the call, in order
+    manual: bool = False
+    manual_index: int = 0  # the next rule to apply, in manual mode
+    # the rules that can apply to each focus signature (in the order of the parsing rules)
+    applicable: dict[FocusSignature, list[CompiledRule]] = field(default_factory=dict)
+    config_count: int = 0  # the number of popped configurations
+    budget: Budget = None
+    deadline: float = None  # the perf_counter() time of the budget's timeout
+    max_empty_shifts: int = None  # empty shifts may be repeated up to this number per derivation; None: once each
+    # how long an applied empty-shift rule is excluded from the derivation (see Derivation.extend())
+    empty_scope: str = 'derivation'
+    # with repeated empty shifts: the category selected by each empty-shift rule (if only overt words can head it),
+    # and the categories the words from each position on can head
+    empty_selects: dict[LCRule, str] = field(default_factory=dict)
+    empty_support: tuple[frozenset, ...] = ()
+    status: ParseStatus = None  # set when the search stops
 
 
 class LCParser:
-    def __init__(self, grammar: MG):
+    def __init__(self, grammar: MG, trace=False, trace_stack=False, stats: ParseStats = None):
+        """
+        :param grammar: The grammar to parse with.
+        :param trace: Log every step of the parsing process; when off (the default), no log message is formatted.
+        :param trace_stack: Also log the whole stack after every push (costs O(stack) per push), requires trace.
+        :param stats: Optional statistics collector, filled by every parse (see lc/lc_stats.py); off by default.
+        The parser only reads its grammar and its (compiled) rules, the state of each parse is kept in its own
+        ParseContext: a parser can be shared by threads and asyncio tasks (apart from the statistics collector).
+        """
         self.grammar = grammar
         self.logger = logger
-        self.parsing_rules = []
+        self.trace = trace
+        self.trace_stack = trace and trace_stack
+        self.parsing_rules: tuple[LCRule, ...] = self.generate_parsing_rules()  # the default rules
+        self.compiled_rules: dict[LCRule, CompiledRule] = {}
+        self.stats = stats
+        if stats is not None:
+            # the timed operations are shadowed on the instance, so they cost nothing without stats
+            self.lc = stats.timed('lc', self.lc)
+            self.comp = stats.timed('comp', self.comp)
+            self.select = stats.timed('select', self.select)
+            self.shift = stats.timed('shift', self.shift)
+            self.empty_shift = stats.timed('shift', self.empty_shift)
 
     def log_stack(self, stack):
         stack_str = 'STACK:\n'
-        for config, applied_rules in stack:
-            stack_str += f"Config: {config}, Rules: {applied_rules}\n"
+        for node in stack:
+            stack_str += f"{node}\n"
         self.logger.warning(stack_str)
 
-    def generate_parsing_rules(self):
+    def generate_parsing_rules(self) -> tuple[LCRule, ...]:
         """
         Generate the appropriate rules for the parsing process.
-        Based on the lexicon, add the relevant empty-shift rules (e.g., shift([], [=v,c])).
-        :return: A list of parsing rules.
+        Based on the lexicon, add the relevant empty-shift rules (e.g., shift([], [=v,c])) to the grammar's rules
+        (the grammar itself is left unchanged).
+        :return: A tuple of parsing rules.
         """
-        self.parsing_rules = self.grammar.rules
-        for item in self.grammar.lexicon:
+        parsing_rules = list(self.grammar.rules)
+        for item in self.grammar.empty_items:
             # Add the empty-shift rule for each feature
-            if item.element == '':
-                # we abuse ':' as a separator between the lexical item and its features
-                self.parsing_rules.append(LCRule(f"shift([]:{item.features})".replace(' ', '')))
+            # we abuse ':' as a separator between the lexical item and its features
+            parsing_rules.append(LCRule(f"shift([]:[{','.join(str(f) for f in item.features)}])"))
+        return tuple(parsing_rules)
 
-    def step(self, rule, config, stack, count, applied_rules):
-        if rule.lc_rule == 'lc2' and rule.inner_part == 'merge2':
+    def compile_rule(self, rule: LCRule) -> CompiledRule:
+        """
+        Compiles the rule once (per parser): binds its lc and composition parts to the functions applying them.
+        """
+        compiled = self.compiled_rules.get(rule)
+        if compiled is not None:
+            return compiled
+
+        lc = comp = None
+        if not rule.is_shift():
+            lc = LC_HANDLERS.get((rule.kind, rule.inner))
+            if lc is None:
+                raise NotImplementedError(f"The rule {rule} is not supported: no {rule.lc_rule}({rule.inner_part})")
+        if rule.is_comp():
+            comp = COMP_HANDLERS.get(rule.comp)
+            if comp is None:
+                raise NotImplementedError(f"The rule {rule} is not supported: no {rule.comp_rule} composition")
+        compiled = CompiledRule(rule, lc, comp, rule.is_shift(), rule.is_empty_shift(),
+                                rule.kind is LCKind.LC2 and rule.inner is InnerKind.MERGE2)
+        # concurrent calls may compile the same rule, they all keep the first one
+        return self.compiled_rules.setdefault(rule, compiled)
+
+    def get_signature(self, config: Configuration) -> FocusSignature:
+        """
+        Returns the focus signature of the configuration, which indexes the rules that can apply to it.
+        """
+        queue = config.queue
+        if not queue:
+            return FocusSignature(None)
+        focus = queue.head
+        if not focus.is_single():
+            return FocusSignature('arrow', rest_arrows=queue.tail.arrows > 0, arrows=True)
+        exp = focus.exp
+        fs = exp.features
+        return FocusSignature('single', exp.stype, fs[0].prefix if fs else None,
+                              len(fs) > 1 and fs[1].is_licensee(), bool(exp.movers),
+                              queue.tail.arrows > 0, queue.arrows > 0)
+
+    def get_rule_vars(self, rule: CompiledRule, config: Configuration) -> list:
+        """
+        Returns the possible instantiations of a rule's variable, the rule is applied once for each:
+        lc2(merge2) guesses the feature following the selector (gamma), and shift branches over every lexical item
+        of the next word (ambiguity).
+        :return: A list of variables, [None] for rules without one.
+        """
+        if rule.gammas:
             if not config.queue:
-                self.logger.info("No focus element in the queue! returning same config")
-                return
+                if self.trace:
+                    self.logger.info("No focus element in the queue! returning same config")
+                return []
 
-            focus = config.queue[0]
+            focus = config.queue.head
             if not focus.is_single():
-                return
+                return []
             # get the future-selectee feature of the focus element
             f = focus.exp.features[0].feature
-            gammas = self.get_gammas_for_feature(f)
+            return self.get_gammas_for_feature(f)
 
-            for gamma in gammas:
-                new_config = self.apply_rule(rule, config, var=gamma)  # step()
-                # if we passed the rule (i.e., the oracle check passed), add the new configuration to the stack
-                if new_config != config:
+        if rule.shift and not rule.empty_shift:
+            if not config.remaining_input:
+                return []
+            return self.grammar.get_lexicon_items(config.remaining_input[0])
+
+        return [None]
+
+    def step(self, rule: CompiledRule, node: Derivation, stack: Agenda, context: ParseContext):
+        """
+        Applies the rule to the node's configuration and pushes the new configurations to the stack (agenda).
+        A generator: when a new configuration is merged into an equivalent one that already leads to a successful
+        configuration, yields (the merged node, the node the rule was applied to, the rule), as in search().
+        """
+        config = node.config
+        rule_vars = self.get_rule_vars(rule, config)
+        if not rule_vars and self.stats is not None:
+            # nothing to apply the rule with (no word left, an unknown word, no gamma for the focus)
+            self.stats.record(rule, CONDITION)
+        for var in rule_vars:
+            new_config = self.apply_rule(rule, config, var=var)  # step()
+            # if we passed the rule (i.e., the oracle check passed), add the new configuration to the stack
+            if new_config is not config:
+                new_node = node.extend(new_config, rule.rule, context.empty_scope)
+                key = new_node.get_key()
+                old_node = stack.lookup(key)
+                if old_node is not None:
+                    # an equivalent configuration was already reached, only record the new derivation
+                    if self.trace:
+                        self.logger.info(f"Merging {rule} result with an equivalent configuration: {new_config}")
+                    old_node.merge(node, rule.rule)
+                    if old_node.productive:
+                        yield old_node, node, rule.rule
+                    continue
+                new_node.link()
+                if self.trace:
                     self.logger.warning(
-                        f"{count + 1}. {rule} {new_config.remaining_input}\n{new_config.get_queue_string()}")
-                    stack.append((new_config, applied_rules + [rule]))
+                        f"{node.depth + 1}. {rule} {new_config.remaining_input}\n{new_config.get_queue_string()}")
+                stack.push(key, new_node)
+                if self.trace_stack:
                     self.log_stack(stack)
-        else:
-            new_config = self.apply_rule(rule, config)  # step()
-            # if we passed the rule (i.e., the oracle check passed), add the new configuration to the stack
-            if new_config != config:
-                self.logger.warning(
-                    f"{count + 1}. {rule} {new_config.remaining_input}\n{new_config.get_queue_string()}")
-                stack.append((new_config, applied_rules + [rule]))
-                self.log_stack(stack)
 
-    def parse(self, input_str: list[str], rules: list[LCRule] = None, manual=False):
+    def parse(self, input_str: list[str], rules: list[LCRule] = None, manual=False, max_results: int = None,
+              engine='stack', budget: Budget = None, empty_shifts='once', deepening=False):
         """
         Parse the input string using the provided rules.
         This is of course different from the Prolog version, we do not define parse_steps()
@@ -92,58 +322,457 @@ class LCParser:
         :param input_str: The input string to parse as a list of tokens, (e.g., ['John', 'likes', 'Mary'])
         :param rules: Optional rules to use for parsing; if not provided, use the grammar's rules.
         :param manual: Apply rules in a linear, manual order (as in the paper).
+        :param max_results: Optional number of derivations after which the search stops (first-k).
+        :param engine: The search engine (see lc/lc_agenda.py): 'stack' (depth-first), 'queue' (breadth-first) or
+                       'best' (best-first), which all find the same derivations; 'beam' (approximate, the best nodes of
+                       each position); or a factory of agendas.
+        :param budget: Optional resource limits (time, configurations, stack size, memory); when one is hit, the
+                       search stops and the derivations found so far are returned (see parse_with_status()).
+        :param empty_shifts: 'once' (default): each empty-shift rule is applied at most once per derivation;
+                             'repeat': the empty-shift rules are applied as many times as the input can support (see
+                             get_empty_support()), even at the same position (e.g., a clausal subject); or a number,
+                             the maximal number of empty shifts per derivation.
+        :param deepening: With repeated empty shifts, search with 0, 1, ... empty shifts per derivation (iterative
+                          deepening), so the derivations with the fewest empty shifts are found first.
         :return: A list of successful configurations and the applied rules.
         """
-        if rules:
-            self.parsing_rules = rules
-        elif not self.parsing_rules:
-            self.generate_parsing_rules()
-        self.logger.info(f"Parsing the sentence: {input_str}")
-        self.logger.info(f"Using the rules: {self.parsing_rules}")
-        self.logger.info(f"Using the grammar: {self.grammar}")
-
-        initial_config = Configuration(0, input_str, [])
-        stack = [(initial_config, [])]
-        results = []
-        config_count = 0
-
-        while stack:
-            config, applied_rules = stack.pop()
-            config_count += 1
-            count = len(applied_rules)
-            self.logger.error(f"Popping config No.{config_count} with {count} applied rules {applied_rules}: {config}")
-            if self.is_success(config):
-                self.logger.info(f"Config No.{config_count} is successful! after {count} applied rules!")
-                results.append((config, applied_rules))
-                continue
+        return list(islice(self.parse_iter(input_str, rules=rules, manual=manual, engine=engine, budget=budget,
+                                           empty_shifts=empty_shifts, deepening=deepening), max_results))
 
-            if manual:
-                # exhausted all rules for this configuration
-                if not self.parsing_rules:
-                    continue
-                rule = self.parsing_rules.pop(0)
-                self.step(rule, config, stack, count, applied_rules)
-                continue
+    def parse_with_status(self, input_str: list[str], rules: list[LCRule] = None, manual=False,
+                          max_results: int = None, engine='stack', budget: Budget = None, empty_shifts='once',
+                          deepening=False) -> ParseResult:
+        """
+        Parse the input string as parse() does, also returning why the search stopped (e.g., which limit of the budget
+        was hit) and the number of popped configurations.
+        :return: A ParseResult (results, status, config_count).
+        """
+        context = self.new_context(input_str, rules, manual, budget, empty_shifts)
+        derivations = self.iter_context(input_str, context, engine, deepening)
+        try:
+            results = list(islice(derivations, max_results))
+        finally:
+            derivations.close()
+        return ParseResult(results, context.status, context.config_count)
+
+    def parse_iter(self, input_str: list[str], rules: list[LCRule] = None, manual=False, engine='stack',
+                   budget: Budget = None, empty_shifts='once', deepening=False):
+        """
+        Parse the input string, yielding each successful derivation as soon as it is found.
+        Closing the generator (or breaking out of a loop over it) stops the search.
+        See parse() for the parameters.
+        :return: A generator of successful configurations and the applied rules.
+        """
+        context = self.new_context(input_str, rules, manual, budget, empty_shifts)
+        return self.iter_context(input_str, context, engine, deepening)
 
-            # Explore applying each rule to the current configuration
-            for rule in self.parsing_rules:
-                # Skip the empty-shift rule if it has already been applied
-                if rule.is_empty_shift() and rule in applied_rules:
-                    self.logger.info(f"Skipping rule: {rule} as it has already been applied!")
-                    # TODO: relax this condition to allow multiple empty-shift rules (Input 3)
-                    continue
+    def iter_context(self, input_str: list[str], context: ParseContext, engine='stack', deepening=False):
+        """
+        Runs the search of the parse context, yielding the successful derivations; with iterative deepening, runs a
+        search per maximal number of empty shifts, each yielding the derivations with exactly that number.
+        The context gets the status of the last search, and the popped configurations of all of them.
+        """
+        if not deepening or context.max_empty_shifts is None:
+            yield from self.iter_derivations(self.search(input_str, engine=engine, context=context))
+            return
+        for depth in range(context.max_empty_shifts + 1):
+            if self.trace:
+                self.logger.info(f"Searching with at most {depth} empty shifts")
+            round_context = replace(context, max_empty_shifts=depth, status=None)
+            try:
+                yield from self.iter_derivations(self.search(input_str, engine=engine, context=round_context),
+                                                 empty_count=depth)
+            finally:
+                context.config_count = round_context.config_count
+                context.status = round_context.status
+            if context.status is not ParseStatus.COMPLETE:
+                return
 
-                if applied_rules and (rule.is_empty_shift() or rule.is_shift()) and \
-                        (applied_rules[-1].is_empty_shift() or applied_rules[-1].is_shift()):
-                    self.logger.info(f"Skipping rule: {rule} because it follows a shift rule!")
+    def iter_derivations(self, search, empty_count: int = None):
+        """
+        Rebuilds the successful derivations completed by the events of a search (see search()).
+        :param empty_count: Only rebuild the derivations with this number of empty shifts.
+        :return: A generator of successful configurations and the applied rules.
+        """
+        result_count = 0
+        try:
+            for node, parent, rule in search:
+                # the full lists of rules are only rebuilt for the successful derivations
+                if parent is None:
+                    if empty_count is not None and node.empty_count != empty_count:
+                        continue
+                    for rules_list in node.iter_rules():
+                        result_count += 1
+                        yield node.config, rules_list
                     continue
+                for success, suffix in node.iter_suffixes():
+                    if empty_count is not None and success.empty_count != empty_count:
+                        continue
+                    for prefix in parent.iter_rules():
+                        result_count += 1
+                        yield success.config, prefix + [rule] + suffix
+        finally:
+            search.close()
+            if self.trace:
+                self.logger.info(f"Found {result_count} successful derivations.")
+
+    def parse_forest(self, input_str: list[str], rules: list[LCRule] = None, manual=False,
+                     engine='stack', budget: Budget = None, empty_shifts='once') -> DerivationForest:
+        """
+        Parse the input string, returning the packed forest of its successful derivations instead of a list of them:
+        the derivation steps shared by several derivations are stored once, and the derivations are counted,
+        enumerated or picked (by index) from the forest without building them all.
+        See parse() for the parameters.
+        :return: The derivation forest; its status tells why the search stopped (it holds the derivations found until
+                 then when a limit of the budget was hit).
+        """
+        context = self.new_context(input_str, rules, manual, budget, empty_shifts)
+        search = self.search(input_str, engine=engine, context=context)
+        successes = [node for node, parent, _ in search if parent is None]
+        return DerivationForest(successes, context.status)
 
-                self.step(rule, config, stack, count, applied_rules)
+    def count_parses(self, input_str: list[str], rules: list[LCRule] = None, manual=False, engine='stack',
+                     budget: Budget = None, empty_shifts='once') -> int:
+        """
+        Counts the successful derivations of the input string without building them: the merged (equivalent)
+        configurations are counted once, as the sum of the counts of the configurations they were reached from.
+        See parse() for the parameters; with a budget, use parse_forest() to tell whether the count is complete.
+        :return: The number of successful derivations (found before a limit of the budget was hit).
+        """
+        forest = self.parse_forest(input_str, rules=rules, manual=manual, engine=engine, budget=budget,
+                                   empty_shifts=empty_shifts)
+        return forest.count()
 
-        self.logger.info(f"Finished parsing. Found {len(results)} successful derivations, "
-                         f"after {config_count} configurations.")
+    def parse_batch(self, sentences: list[list[str]], workers: int = None, ordered=True, retries=0, **kwargs):
+        """
+        Parses a batch of sentences on a pool of worker processes. Each worker loads the grammar (and compiles the
+        rules) once, then parses its share of the sentences.
+        When a worker process dies (e.g., killed out of memory), the pool is restarted and the sentences it held are
+        parsed again, one at a time, so only the sentence that killed it fails (a death counts as one of its attempts).
+        :param sentences: The sentences to parse, each a list of tokens.
+        :param workers: The number of worker processes (default: the number of cores); 1 parses in this process.
+        :param ordered: Yield the results in the order of the sentences, otherwise as soon as they complete.
+        :param retries: The number of times a failed sentence is parsed again before its error is reported.
+        :param kwargs: The parameters of parse() (rules, max_results, engine).
+        :return: A generator of BatchResult, one per sentence; a failed sentence has no results but an error.
+        """
+        if workers == 1:
+            for index, sentence in enumerate(sentences):
+                yield self._parse_with_retries(index, sentence, retries, kwargs)
+            return
+
+        pool = self._new_pool(workers)
+        futures = {}  # future -> (index, sentence, attempt)
+        # the sentences in the pool when a worker died, parsed again one at a time to find the one that killed it
+        suspects = []
+        held = {}  # index -> BatchResult, waiting for the results of the previous sentences (when ordered)
+        next_index = 0
+        try:
+            for index, sentence in enumerate(sentences):
+                futures[pool.submit(_parse_in_worker, sentence, kwargs)] = (index, sentence, 0)
+            while futures or suspects:
+                if not futures:
+                    index, sentence, attempt = suspects.pop(0)
+                    futures[pool.submit(_parse_in_worker, sentence, kwargs)] = (index, sentence, attempt)
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                    done, _ = wait(futures)  # a worker died: every future left in the pool fails with it
+                results, retried, crashed = [], [], []
+                for future in done:
+                    index, sentence, attempt = futures.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        results.append(BatchResult(index, sentence, future.result()))
+                    elif isinstance(error, BrokenProcessPool):
+                        crashed.append((index, sentence, attempt))
+                    elif attempt < retries:
+                        retried.append((index, sentence, attempt + 1))
+                    else:
+                        results.append(self._failed_result(index, sentence, error))
+
+                if crashed:
+                    pool.shutdown()
+                    pool = self._new_pool(workers)
+                    if len(crashed) > 1:
+                        suspects = sorted(suspects + crashed)
+                    else:
+                        # the only sentence in the pool when its worker died
+                        index, sentence, attempt = crashed[0]
+                        if attempt < retries:
+                            suspects.insert(0, (index, sentence, attempt + 1))
+                        else:
+                            results.append(self._failed_result(index, sentence, BrokenProcessPool(
+                                "A worker process died while parsing the sentence")))
+                for index, sentence, attempt in retried:
+                    futures[pool.submit(_parse_in_worker, sentence, kwargs)] = (index, sentence, attempt)
+
+                for result in results:
+                    if ordered:
+                        held[result.index] = result
+                    else:
+                        yield result
+                while next_index in held:
+                    yield held.pop(next_index)
+                    next_index += 1
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def parse_parallel(self, input_str: list[str], workers: int = None, rules: list[LCRule] = None, engine='stack',
+                       split=4) -> list:
+        """
+        Parses the input string on a pool of worker processes. The first levels of the search are expanded here, until
+        the agenda holds split nodes per worker (the frontier); then the workers search the subtrees of the frontier
+        nodes, each taking the next subtree as soon as it is done, and their derivations are joined to the derivations
+        reaching the frontier nodes.
+        The workers do not share their visited tables, so a configuration reached from two subtrees is explored twice;
+        the derivations are the same as the ones of parse(), in a different order.
+        :param workers: The number of worker processes (default: the number of cores).
+        :param split: The number of subtrees per worker.
+        See parse() for the other parameters.
+        :return: A list of successful configurations and the applied rules.
+        """
+        context = self.new_context(input_str, rules)
+        stack = make_agenda(engine)
+        root = Derivation(Configuration(0, tuple(input_str), EMPTY_QUEUE))
+        stack.push(root.get_key(), root)
+        frontier_size = split * (workers or os.cpu_count())
+        successes = []
+        while stack and len(stack) < frontier_size:
+            context.config_count += 1
+            for node, parent, _ in self.expand(stack.pop(), stack, context):
+                if parent is None:
+                    successes.append(node)
+        # the derivations are rebuilt once the expansion is done, when all the merges into its nodes are known
+        results = [(success.config, rules_list) for success in successes for rules_list in success.iter_rules()]
+        frontier = list(stack)
+        if self.trace:
+            self.logger.info(
+                f"Expanded {context.config_count} configurations, searching {len(frontier)} subtrees in parallel.")
+        if not frontier:
+            return results
+
+        kwargs = {'rules': [rule.rule for rule in context.rules], 'engine': engine}
+        with self._new_pool(workers) as pool:
+            futures = {pool.submit(_search_in_worker, node.config, node.empty_shifts, node.empty_count,
+                                   node.after_shift, kwargs): node
+                       for node in frontier}
+            for future in as_completed(futures):
+                node = futures[future]
+                for config, suffix in future.result():
+                    for prefix in node.iter_rules():
+                        results.append((config, prefix + suffix))
         return results
 
+    def _parse_with_retries(self, index: int, sentence: list[str], retries: int, kwargs: dict) -> BatchResult:
+        error = None
+        for _ in range(retries + 1):
+            try:
+                return BatchResult(index, sentence, self.parse(sentence, **kwargs))
+            except Exception as e:
+                error = e
+        return self._failed_result(index, sentence, error)
+
+    def _failed_result(self, index: int, sentence: list[str], error: BaseException) -> BatchResult:
+        if self.trace:
+            self.logger.error(f"Failed parsing sentence No.{index} {sentence}: {error!r}")
+        return BatchResult(index, sentence, [], repr(error))
+
+    def _new_pool(self, workers: int = None) -> ProcessPoolExecutor:
+        """
+        Returns a pool of worker processes, each with a parser of the grammar (see _init_worker()).
+        """
+        return ProcessPoolExecutor(workers, initializer=_init_worker,
+                                   initargs=(self.grammar, self.trace, self.trace_stack))
+
+    def search(self, input_str: list[str], rules: list[LCRule] = None, manual=False, engine='stack',
+               root: Derivation = None, budget: Budget = None, context: ParseContext = None, empty_shifts='once'):
+        """
+        Runs the search over the configurations of the input string (see parse() for the parameters).
+        A generator of the events completing new derivations, as tuples (node, parent, rule):
+        - (a successful node, None, None) when a successful configuration is reached, completing all the derivations
+          reaching it.
+        - (a merged node, parent, rule) when applying the rule to the parent reached an already explored node,
+          completing the derivations through the new edge and the successful nodes reachable from the merged node.
+        :param root: Optional node to start the search from, instead of the initial configuration of the input string.
+        :param budget: Optional resource limits, the search stops when one is hit.
+        :param context: Optional context of the parse (see new_context()), replacing the rules, manual, budget and
+                        empty_shifts parameters; its status tells why the search stopped.
+        """
+        if context is None:
+            context = self.new_context(input_str, rules, manual, budget, empty_shifts)
+        budget = context.budget
+        stack = make_agenda(engine)
+        if root is None:
+            root = Derivation(Configuration(0, tuple(input_str), EMPTY_QUEUE))
+        stack.push(root.get_key(), root)
+        stats = self.stats
+        if stats is not None:
+            stats.searches += 1
+
+        try:
+            while stack:
+                if budget is not None:
+                    context.status = self.check_budget(context, stack)
+                    if context.status is not None:
+                        break
+                context.config_count += 1
+                node = stack.pop()
+                if stats is not None:
+                    stats.record_pop(len(stack) + 1, len(node.config.queue))
+                yield from self.expand(node, stack, context)
+        finally:
+            if context.status is None:
+                context.status = ParseStatus.STOPPED if stack else ParseStatus.COMPLETE
+            if self.trace:
+                state = 'Finished' if context.status is ParseStatus.COMPLETE else f"Stopped ({context.status.value})"
+                self.logger.info(f"{state} parsing after {context.config_count} configurations.")
+
+    def check_budget(self, context: ParseContext, stack: Agenda) -> ParseStatus:
+        """
+        Checks the budget of the parse before popping the next configuration.
+        :return: The status of the exceeded limit, None if the search can go on.
+        """
+        budget = context.budget
+        if budget.max_configs is not None and context.config_count >= budget.max_configs:
+            return ParseStatus.MAX_CONFIGS
+        if budget.max_stack is not None and len(stack) > budget.max_stack:
+            return ParseStatus.MAX_STACK
+        if budget.max_memory is not None and (context.config_count + len(stack)) * NODE_BYTES > budget.max_memory:
+            return ParseStatus.MAX_MEMORY
+        if context.deadline is not None and perf_counter() > context.deadline:
+            return ParseStatus.TIMEOUT
+        return None
+
+    def new_context(self, input_str: list[str], rules: list[LCRule] = None, manual=False, budget: Budget = None,
+                    empty_shifts='once') -> ParseContext:
+        """
+        Returns the context of a new parse, with its parsing rules (the given ones, or the default ones) compiled.
+        See parse() for the parameters; input_str is None when the input is not known in advance (a stream, see
+        lc.lc_incremental): without a number, the repeated empty shifts are then only bounded to once per position.
+        """
+        rules = rules or self.parsing_rules
+        if self.trace:
+            self.logger.info(f"Parsing the sentence: {input_str}")
+            self.logger.info(f"Using the rules: {list(rules)}")
+            self.logger.info(f"Using the grammar: {self.grammar}")
+        deadline = perf_counter() + budget.timeout if budget is not None and budget.timeout is not None else None
+        context = ParseContext(tuple(self.compile_rule(rule) for rule in rules), manual, budget=budget,
+                               deadline=deadline)
+        if empty_shifts == 'once':
+            return context
+        if empty_shifts != 'repeat' and (not isinstance(empty_shifts, int) or empty_shifts < 0):
+            raise ValueError(f"Unknown empty shifts mode: {empty_shifts}, expected 'once', 'repeat' or a number")
+        context.empty_scope = None
+        if input_str is None:
+            if empty_shifts == 'repeat':
+                context.max_empty_shifts = sys.maxsize
+                context.empty_scope = 'position'
+            else:
+                context.max_empty_shifts = empty_shifts
+            return context
+        context.empty_selects, context.empty_support, bound = self.get_empty_support(input_str, rules)
+        context.max_empty_shifts = bound if empty_shifts == 'repeat' else empty_shifts
+        return context
+
+    def get_empty_support(self, input_str: list[str], rules) -> tuple[dict[LCRule, str], tuple[frozenset, ...], int]:
+        """
+        Bounds the repeated empty shifts by what the input can support. An empty head selecting a category that only
+        overt words can head, e.g. [=v,c], needs its own such word in the input, after its position (the heads of
+        distinct complements are distinct words).
+        :return: The category selected by each bounded empty-shift rule, the categories the words from each position
+                 on can head, and the maximal number of empty shifts in a derivation.
+        """
+        def category(item: LexItem) -> str:
+            return next((f.feature for f in item.features if not f.prefix), None)
+
+        empty_categories = {category(item) for item in self.grammar.empty_items}
+        selects = {}
+        for rule in rules:
+            if rule.is_empty_shift():
+                features = rule.empty_features
+                if features and features[0].is_selector() and features[0].feature not in empty_categories:
+                    selects[rule] = features[0].feature
+
+        word_categories = [{category(item) for item in self.grammar.get_lexicon_items(word)} for word in input_str]
+        support = [frozenset()]
+        for categories in reversed(word_categories):
+            support.append(support[-1] | categories)
+        support.reverse()
+
+        bound = len(input_str)
+        if all(rule in selects for rule in rules if rule.is_empty_shift()):
+            selected = set(selects.values())
+            bound = min(bound, sum(1 for categories in word_categories if categories & selected))
+        return selects, tuple(support), bound
+
+    def expand(self, node: Derivation, stack: Agenda, context: ParseContext):
+        """
+        Expands a node popped from the stack (agenda): applies the rules that can apply to its configuration.
+        A generator of the events completing new derivations (see search()).
+        """
+        config = node.config
+        config_count = context.config_count
+        count = node.depth
+        if self.trace:
+            self.logger.error(
+                f"Popping config No.{config_count} with {count} applied rules {node.get_rules()}: {config}")
+        if self.is_success(config):
+            if self.trace:
+                self.logger.info(f"Config No.{config_count} is successful! after {count} applied rules!")
+            node.mark_success()
+            yield node, None, None
+            return
+
+        if context.manual:
+            # exhausted all rules for this configuration
+            if context.manual_index >= len(context.rules):
+                return
+            rule = context.rules[context.manual_index]
+            context.manual_index += 1
+            yield from self.step(rule, node, stack, context)
+            return
+
+        # Explore applying each rule (that can apply) to the current configuration
+        signature = self.get_signature(config)
+        rules = context.applicable.get(signature)
+        if rules is None:
+            rules = context.applicable[signature] = [rule for rule in context.rules if rule.admits(signature)]
+        for rule in rules:
+            if rule.empty_shift:
+                # Skip the empty-shift rule if it is excluded: once applied, by default; at this position, on a stream
+                # of unknown words (see Derivation.extend()). Otherwise only the bound below limits the empty shifts
+                if rule.rule in node.empty_shifts:
+                    if self.trace:
+                        self.logger.info(f"Skipping rule: {rule} as it has already been applied!")
+                    if self.stats is not None:
+                        self.stats.record(rule, SKIPPED)
+                    continue
+                if context.max_empty_shifts is not None:
+                    if node.empty_count >= context.max_empty_shifts:
+                        if self.trace:
+                            self.logger.info(f"Skipping rule: {rule} after {node.empty_count} empty shifts!")
+                        if self.stats is not None:
+                            self.stats.record(rule, SKIPPED)
+                        continue
+                    selected = context.empty_selects.get(rule.rule)
+                    support = context.empty_support
+                    if selected is not None and (config.current_pos >= len(support)
+                                                 or selected not in support[config.current_pos]):
+                        if self.trace:
+                            self.logger.info(f"Skipping rule: {rule} as no word left can head its {selected}!")
+                        if self.stats is not None:
+                            self.stats.record(rule, SKIPPED)
+                        continue
+
+            if node.after_shift and rule.shift:
+                if self.trace:
+                    self.logger.info(f"Skipping rule: {rule} because it follows a shift rule!")
+                if self.stats is not None:
+                    self.stats.record(rule, SKIPPED)
+                continue
+
+            yield from self.step(rule, node, stack, context)
+
     def is_success(self, config: Configuration) -> bool:
         """
         Success if input is fully consumed and queue contains a single, valid structure
@@ -157,7 +786,7 @@ class LCParser:
             return False
 
         # Check span covers the entire input and no movers remain
-        final_exp = config.queue[0].exp
+        final_exp = config.queue.head.exp
         if (final_exp.left != 0) or (final_exp.right != config.current_pos) or (final_exp.movers):
             return False
 
@@ -167,7 +796,7 @@ class LCParser:
 
         return True
 
-    def apply_rule(self, rule: LCRule, config: Configuration, var=None) -> Configuration:
+    def apply_rule(self, rule: CompiledRule, config: Configuration, var=None) -> Configuration:
         """
         Applies a parsing rule to the current configuration.
         :param rule: The rule to apply.
@@ -175,7 +804,8 @@ class LCParser:
         :param var: Optional variable for extended functionality of the rule.
         :return: Updated configuration after applying the rule.
         """
-        self.logger.info(f"Got rule: {rule}, config: {config}, with var={var}")
+        if self.trace:
+            self.logger.info(f"Got rule: {rule}, config: {config}, with var={var}")
         new_pos, new_input = config.current_pos, config.remaining_input
         updated_queue = config.queue
         result: Term = None
@@ -183,70 +813,84 @@ class LCParser:
         # ~~~ STEP 1: HANDLE SHIFT/LC RULES ~~~
 
         # Apply a shift rule - no changes for (pos, input), update (original queue)
-        if rule.is_empty_shift():  # can be applied at any time
-            # get the features of the empty lexical item
-            fs = rule.inner_part.split(':')[1].strip('[]')
-            result = self.empty_shift(fs, config.current_pos)
+        if rule.empty_shift:  # can be applied at any time
+            # the features of the empty lexical item are parsed with the rule
+            result = self.empty_shift(rule.rule.empty_features, config.current_pos)
 
         # Apply a shift rule - new (pos, input), update (original queue)
-        elif rule.is_shift():  # based on remaining input
-            result, new_pos, new_input = self.shift(config.remaining_input, config.current_pos)
+        elif rule.shift:  # based on remaining input
+            result, new_pos, new_input = self.shift(config.remaining_input, config.current_pos, item=var)
 
         # Apply the LC rule to the focus - no changes for (pos, input), new (queue)
-        elif rule.is_lc():
+        else:
             if not config.queue:
-                self.logger.info("No focus element in the queue! returning same config")
+                if self.trace:
+                    self.logger.info("No focus element in the queue! returning same config")
+                if self.stats is not None:
+                    self.stats.record(rule, CONDITION)
                 return config
-            focus, *remaining_queue = config.queue  # unpack the queue
+            focus, remaining_queue = config.queue.head, config.queue.tail  # unpack the queue
             result = self.lc(rule, focus, var=var)
             new_pos, new_input = config.current_pos, config.remaining_input
             updated_queue = remaining_queue
 
         if result is None:
-            self.logger.info(f"No result after applying {rule}! returning same config")
+            if self.trace:
+                self.logger.info(f"No result after applying {rule}! returning same config")
+            if self.stats is not None:
+                self.stats.record(rule, CONDITION)
             return config
 
         # ~~~ STEP 2: HANDLE COMPOSITION ~~~
 
         # Apply the comp rule - no changes for (pos, input), new (queue)
-        if rule.is_comp():
+        if rule.comp is not None:
             # we have the result waiting for us to complete a prediction
             # we further update the queue (removing top element)
             result, updated_queue = self.comp(rule, result, updated_queue)
             if result is None:
-                self.logger.info(f"No result after applying {rule}! returning same config")
+                if self.trace:
+                    self.logger.info(f"No result after applying {rule}! returning same config")
+                if self.stats is not None:
+                    self.stats.record(rule, COMPOSITION)
                 return config
 
         # insert the new result to the updated queue (after being processed by all the rules)
-        new_queue = [result] + updated_queue
+        new_queue = updated_queue.push(result)
 
-        if self.oracle_ok(new_queue, result):
-            self.logger.info("Passed the oracle check! returning new config")
+        if self.oracle_ok(result, new_pos, new_input):
+            if self.trace:
+                self.logger.info("Passed the oracle check! returning new config")
+            if self.stats is not None:
+                self.stats.record(rule)
             return Configuration(new_pos, new_input, new_queue)
 
-        self.logger.info("Failed the oracle check! returning same config")
+        if self.trace:
+            self.logger.info("Failed the oracle check! returning same config")
+        if self.stats is not None:
+            self.stats.record(rule, ORACLE)
         return config
 
-    def empty_shift(self, fs: str, pos: int) -> Term:
+    def empty_shift(self, features: tuple[Feature, ...], pos: int) -> Term:
         """
         Empty shift operation: moves an empty element to the queue.
         shift(Input,Input,shift([],Fs),Pos,Pos,(Pos,Pos,'::',Fs,[])) :- ([]::Fs).
-        :param fs: Features of the empty element, as concatenated string (e.g., '=v,+wh,c')
+        :param features: Features of the empty element (e.g., [=v,+wh,c])
         :param pos: Current position in the input.
         :return: The new result term.
         """
-        self.logger.info(f"fs = [{fs}], pos = {pos}")
-        # probably the only usage of parse_features() since we specify features in empty-shift in that format
-        features = parse_features(fs)
-        result = Expression(pos, pos, '::', features, [])
+        if self.trace:
+            self.logger.info(f"fs = {list(features)}, pos = {pos}")
+        result = Expression(pos, pos, '::', features, ())
         return Term(result)
 
-    def shift(self, input_data: list[str], pos: int) -> (Term, int, list[str]):
+    def shift(self, input_data: tuple[str, ...], pos: int, item: LexItem = None) -> (Term, int, tuple[str, ...]):
         """
         Shift operation: moves an element from input to the queue.
         shift([W|Input],Input,shift([W],Fs),Pos0,Pos,(Pos0,Pos,'::',Fs,[])) :- ([W]::Fs), Pos is Pos0+1.
         :param input_data: List of tokens representing the remaining input.
         :param pos: Current position in the input.
+        :param item: The lexical item of the next word to shift; if not given, the first one in the lexicon.
         :return: A tuple with the result of shift (new queue element), updated position,
                  and the remaining input after the shift.
         """
@@ -254,45 +898,34 @@ class LCParser:
             return None, pos, input_data
 
         W = input_data[0]
+        if item is None:
+            item = self.grammar.get_lexicon_item(W)
+            if item is None:
+                return None, pos, input_data
         new_input = input_data[1:]
         new_pos = pos + 1
-        fs = self.grammar.get_lexicon_item(W).features
+        fs = item.features
 
-        result = Expression(pos, new_pos, '::', fs, [])
+        result = Expression(pos, new_pos, '::', fs, ())
         return Term(result), new_pos, new_input
 
-    def lc(self, rule: LCRule, focus: Term, var=None) -> Term:
+    def lc(self, rule: CompiledRule, focus: Term, var=None) -> Term:
         """
         Apply the appropriate LC rule to the focus element.
         :param rule: The LC rule to apply.
         :param focus: The focus element in the queue.
         :return: The new result term; None if the rule does not apply.
         """
-        self.logger.info(f"focus={focus}")
+        if self.trace:
+            self.logger.info(f"focus={focus}")
         # Make sure the focus is a single expression
         if not focus.is_single():
             return None
-        exp = focus.exp
 
         # Apply the appropriate LC rule to the focus element
-        if rule.lc_rule == 'lc1':
-            if rule.inner_part == 'merge1':
-                return self.lc1_merge1(exp)
-            elif rule.inner_part == 'merge2':
-                return self.lc1_merge2(focus)
-            elif rule.inner_part == 'merge3':
-                return self.lc1_merge3(focus)
-            elif rule.inner_part == 'move1':
-                return self.lc1_move1(exp)
-            elif rule.inner_part == 'move2':
-                return self.lc1_move2(focus)
-        elif rule.lc_rule == 'lc2':
-            if rule.inner_part == 'merge2':
-                return self.lc2_merge2(exp, var=var)
-            elif rule.inner_part == 'merge3':
-                return self.lc2_merge3(exp)
-
-    def lc1_merge1(self, B: Expression) -> Term:
+        return rule.lc(self, focus.exp, var)
+
+    def lc1_merge1(self, B: Expression, var=None) -> Term:
         """
         s (Left, Mid, '::', [=F|Gamma], []),
         ( t (Mid, Right, _,  [F], Alphas) -> st (Left, Right, ':', Gamma, Alphas) ))
@@ -306,13 +939,13 @@ class LCParser:
         # Extract the feature being selected
         f = B.features[0].feature  # take 'f' from '=f'
         gamma = B.features[1:]  # Remaining features after '=F'
-        alphas = [CHAIN_EXPRESSION]
+        alphas = (CHAIN_EXPRESSION,)
 
-        C = Expression(mid, right, UNKNOWN_STYPE, [Feature(f)], alphas)
+        C = Expression(mid, right, UNKNOWN_STYPE, (Feature(f),), alphas)
         A = Expression(left, right, ':', gamma, alphas)
         return Term(C, A)
 
-    def lc1_move1(self, B: Expression) -> Term:
+    def lc1_move1(self, B: Expression, var=None) -> Term:
         """
         (Mid, Right, ':', [+F|Fs], Movers0),
         (Left, Right, ':', Fs, Movers) ) :- select((Left,Mid,[-F]), Movers0, Movers).
@@ -326,51 +959,44 @@ class LCParser:
         fs = B.features[1:]  # remaining features after '+f'
 
         # find the licensee in the movers list
-        mover = None
-        movers0 = B.movers
-        for m in movers0:
+        mover, movers = None, B.movers
+        for i, m in enumerate(B.movers):
             if (m.right == mid) and (m.features[0].feature == f) and (m.features[0].is_licensee()):
-                mover = m
-                movers0.remove(m)
+                mover, movers = m, B.movers[:i] + B.movers[i + 1:]
                 break
         if mover is None:
             return None
 
-        A = Expression(mover.left, right, ':', fs, movers0)
+        A = Expression(mover.left, right, ':', fs, movers)
         return Term(A)
 
     def get_gammas_for_feature(self, selectee):
-        gammas = []
-        selector = Feature(selectee, "=")
-        for item in self.grammar.lexicon:
-            ind = item.get_last_index(selector)
-            if ind != -1:
-                g = item.features[ind + 1:][0]
-                if g not in gammas:
-                    gammas.append(g)
-        return gammas
+        return self.grammar.get_gammas(selectee)
 
     def lc2_merge2(self, C: Expression, var=None) -> Term:
         """
         t (Left, Mid, _, [F], Iotas),
         ( s ( Mid, Right, ':',  [=F|Gamma], Alphas) -> ts (Left, Right, ':', Gamma, Movers) ))
         """
-        # TODO: Validate match for lc2_merge2?
+        # Validate match for lc2(merge2): the left corner is a complete category
+        if (len(C.features) != 1) or C.features[0].is_selector() or C.features[0].is_licensor() \
+                or C.features[0].is_licensee():
+            return None
 
         left, mid, right = C.left, C.right, UNKNOWN_POS
 
         # Extract the feature being selected
         f = C.features[0].feature  # take 'f'
         iotas = C.movers
-        gamma = [var]
-        alphas = [CHAIN_EXPRESSION]
+        gamma = (var,)
+        alphas = (CHAIN_EXPRESSION,)
         movers = alphas + iotas
 
-        B = Expression(mid, right, ':', [Feature(f, "=")] + gamma, alphas)
+        B = Expression(mid, right, ':', (Feature(f, "="),) + gamma, alphas)
         A = Expression(left, right, ':', gamma, movers)
         return Term(B, A)
 
-    def lc2_merge3(self, C: Expression) -> Term:
+    def lc2_merge3(self, C: Expression, var=None) -> Term:
         """
         t (Left0, Right0, _, [F,-G|Fs], Iotas) ,
         ( s (Left, Right, T, [=F|Gamma], Alphas) -> s, t (Left, Right, ':', Gamma, Movers) ) )
@@ -385,63 +1011,50 @@ class LCParser:
         f = C.features[0].feature  # take 'f'
         G = C.features[1].feature  # take 'G' from '-G'
         iotas = C.movers
-        gamma = [FEATURE_PLACEHOLDER]
-        alphas = [CHAIN_EXPRESSION]
+        gamma = (FEATURE_PLACEHOLDER,)
 
         # we don't put alphas in the movers of B, based on the steps 8-9 in the example derivation
-        B = Expression(UNKNOWN_POS, UNKNOWN_POS, UNKNOWN_STYPE, [Feature(f, "=")] + gamma, [])
-        t = Expression(left0, right0, ':', [Feature(G, "-")], iotas)
+        B = Expression(UNKNOWN_POS, UNKNOWN_POS, UNKNOWN_STYPE, (Feature(f, "="),) + gamma, ())
+        t = Expression(left0, right0, ':', (Feature(G, "-"),), iotas)
         # here we don't put alphas in movers since we have [t] as the next in the chain
-        A = Expression(UNKNOWN_POS, UNKNOWN_POS, ':', gamma, [t])
+        A = Expression(UNKNOWN_POS, UNKNOWN_POS, ':', gamma, (t,))
         return Term(B, A)
 
-    def comp(self, rule: LCRule, result: Term, queue: Queue) -> (Term, Queue):
-        self.logger.info(f"result={result}")
-        self.logger.info(f"queue={queue}")
-
-        if rule.comp_rule == 'c':
-            # Make sure the result is (exp)
-            if not result.is_single():
-                return None, queue
-            exp = result.exp
-            return self.c(exp, queue)
+    def comp(self, rule: CompiledRule, result: Term, queue: Queue) -> (Term, Queue):
+        if self.trace:
+            self.logger.info(f"result={result}")
+            self.logger.info(f"queue={queue}")
 
-        # Make sure the result is (exp -> exp)
-        if result.is_single():
-            return None, queue
-
-        if rule.comp_rule == 'c1':
-            return self.c1(result, queue)
-        elif rule.comp_rule == 'c2':
-            return self.c2(result, queue)
-        elif rule.comp_rule == 'c3':
-            return self.c3(result, queue)
-
-    def select(self, exp: Expression, queue: Queue, left=True) -> Term:
-        for term in queue:
-            if term.is_single():
-                continue
-            # found on left side
-            if left and term.exp == exp:
-                return term
-            # found on right side
-            if (not left) and term.output_exp == exp:
-                return term
-        return None
+        return rule.comp(self, result, queue)
 
-    def c(self, A: Expression, queue: Queue) -> (Term, Queue):
+    def select(self, exp: Expression, queue: Queue, left=True) -> (Term, Queue):
+        """
+        select((A -> B), Queue0, Queue): finds the first (A -> B) in the queue whose left (or right) side matches exp.
+        :return: The selected term and the queue without it; (None, queue) if not found.
+        """
+        # only the terms whose side has a matching first feature and stype are unified
+        for i, term in queue.candidates(exp, left=left):
+            # found on left side / found on right side
+            if (left and term.exp.unifies(exp)) or ((not left) and term.output_exp.unifies(exp)):
+                return term, queue.remove(i)
+        return None, queue
+
+    def c(self, result: Term, queue: Queue) -> (Term, Queue):
         """
         % compose completed result
         composeOrNot(R,A,c(R),B,Queue0,Queue) :- select((A -> B), Queue0, Queue),
         """
+        # Make sure the result is (exp)
+        if not result.is_single():
+            return None, queue
+        A = result.exp
+
         # look for (A' => B) in the queue
-        APrimetB = deepcopy(self.select(A, queue, left=True))
+        APrimetB, queue = self.select(A, queue, left=True)
         if APrimetB is None:
             return None, queue
-        queue.remove(APrimetB)
-        APrime, B = APrimetB.exp, APrimetB.output_exp
-        APrime.match(A)
-        B.match(APrime)
+        APrime = APrimetB.exp.match(A)
+        B = APrimetB.output_exp.match(APrime)
 
         return Term(B), queue
 
@@ -450,13 +1063,15 @@ class LCParser:
         % forward composition
         composeOrNot(R,(A -> B),c1(R),(A -> C),Queue0,Queue) :- select((B -> C), Queue0, Queue),
         """
+        # Make sure the result is (exp -> exp)
+        if AtB.is_single():
+            return None, queue
         A, B = AtB.exp, AtB.output_exp
 
         # look for (B => C) in the queue
-        BtC = deepcopy(self.select(B, queue, left=True))
+        BtC, queue = self.select(B, queue, left=True)
         if BtC is None:
             return None, queue
-        queue.remove(BtC)
         C = BtC.output_exp
 
         # add (A => C)
@@ -470,32 +1085,84 @@ class LCParser:
             select((A -> B), Queue0, Queue1),
             select((C -> D), Queue1, Queue),
         """
+        # Make sure the result is (exp -> exp)
+        if BtC.is_single():
+            return None, queue
         B, C = BtC.exp, BtC.output_exp
 
-        # ! general note: deepcopy is necessary, so we don't match original features in the queue !
+        # ! general note: expressions are immutable, matching builds new ones and leaves the queue intact !
 
         # look for (A => B') in the queue
-        AtBPrime = deepcopy(self.select(B, queue, left=False))
+        AtBPrime, queue = self.select(B, queue, left=False)
         if AtBPrime is None:
             return None, queue
-        queue.remove(AtBPrime)
         A, BPrime = AtBPrime.exp, AtBPrime.output_exp
-        B.match(BPrime)
-        A.match(B)
+        B = B.match(BPrime)
+        A = A.match(B)
 
         # look for (C' => D) in the queue
-        CPrimetD = deepcopy(self.select(C, queue, left=True))
+        CPrimetD, queue = self.select(C, queue, left=True)
         if CPrimetD is None:
             return None, queue
-        queue.remove(CPrimetD)
         CPrime, D = CPrimetD.exp, CPrimetD.output_exp
-        C.match(B)
-        C.match(CPrime)
-        D.match(C)
+        C = C.match(B)
+        C = C.match(CPrime)
+        D = D.match(C)
 
         # add (A => D)
         AtD = Term(A, D)
         return AtD, queue
 
-    def oracle_ok(self, new_queue, result):
-        return True
+    def oracle_ok(self, result: Term, pos: int, remaining_input: tuple[str, ...]) -> bool:
+        """
+        Left-corner link check: a prediction (A => B) whose A starts at the current position can only be completed
+        if the next word can be the first word of A (or A can be empty), based on the grammar's link table.
+        :param result: The new queue element.
+        :param pos: The position after applying the rule.
+        :param remaining_input: The input left after applying the rule.
+        :return: True if the configuration may still lead to a successful parse, False otherwise.
+        """
+        if result.is_single() or result.exp.left != pos:
+            return True
+
+        corners = self.grammar.link_relations.get(tuple(str(f) for f in result.exp.features))
+        if corners is None:  # no lexical item can ever produce the predicted features
+            return False
+        if '' in corners:
+            return True
+        return bool(remaining_input) and (remaining_input[0] in corners or remaining_input[0] is PENDING)
+
+
+LC_HANDLERS: dict[tuple[LCKind, InnerKind], Callable] = {
+    (LCKind.LC1, InnerKind.MERGE1): LCParser.lc1_merge1,
+    (LCKind.LC1, InnerKind.MOVE1): LCParser.lc1_move1,
+    (LCKind.LC2, InnerKind.MERGE2): LCParser.lc2_merge2,
+    (LCKind.LC2, InnerKind.MERGE3): LCParser.lc2_merge3,
+}
+
+COMP_HANDLERS: dict[CompKind, Callable] = {
+    CompKind.C: LCParser.c,
+    CompKind.C1: LCParser.c1,
+    CompKind.C3: LCParser.c3,
+}
+
+
+# the parser of a batch worker process (see LCParser.parse_batch)
+_worker_parser: LCParser = None
+
+
+def _init_worker(grammar: MG, trace: bool, trace_stack: bool):
+    global _worker_parser
+    _worker_parser = LCParser(grammar, trace=trace, trace_stack=trace_stack)
+
+
+def _parse_in_worker(sentence: list[str], kwargs: dict) -> list:
+    return _worker_parser.parse(sentence, **kwargs)
+
+
+def _search_in_worker(config: Configuration, empty_shifts: frozenset, empty_count: int, after_shift: bool,
+                      kwargs: dict) -> list:
+    # the subtree of a frontier node (see LCParser.parse_parallel), its derivations start at the node
+    root = Derivation(config, empty_shifts=empty_shifts, empty_count=empty_count, after_shift=after_shift)
+    search = _worker_parser.search(list(config.remaining_input), root=root, **kwargs)
+    return list(_worker_parser.iter_derivations(search))
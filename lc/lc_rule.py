@@ -5,9 +5,40 @@ There are three types of rules:
 2. lc1/lc2 that wrap merge/move rules
 3. c/c1/c2/c3 that wrap any other rule
 """
+from enum import Enum
+
+from grammar.lexicon import Feature, parse_features
+
+
+class LCKind(Enum):
+    SHIFT = 'shift'
+    LC1 = 'lc1'
+    LC2 = 'lc2'
+
+
+class InnerKind(Enum):
+    MERGE1 = 'merge1'
+    MERGE2 = 'merge2'
+    MERGE3 = 'merge3'
+    MOVE1 = 'move1'
+    MOVE2 = 'move2'
+
+
+class CompKind(Enum):
+    C = 'c'
+    C1 = 'c1'
+    C2 = 'c2'
+    C3 = 'c3'
 
 
 class LCRule:
+    """
+    A rule, compiled once when created: its parts are enums, and the features of an empty-shift rule are pre-parsed.
+    Rules are immutable values, two rules with the same string are equal.
+    """
+    __slots__ = ('raw_rule', 'comp_rule', 'lc_rule', 'inner_part',
+                 'kind', 'inner', 'comp', 'empty_features', '_shift', '_empty_shift')
+
     def __init__(self, rule: str):
         self.raw_rule: str = rule
         self.comp_rule: str = ''
@@ -15,6 +46,18 @@ class LCRule:
         self.inner_part: str = ''
         self.parse_rule()
 
+        self.kind: LCKind = LCKind(self.lc_rule)
+        self.comp: CompKind = CompKind(self.comp_rule) if self.comp_rule else None
+        self.inner: InnerKind = None
+        self.empty_features: tuple[Feature, ...] = None
+        self._shift: bool = self.kind is LCKind.SHIFT
+        self._empty_shift: bool = self._shift and self.inner_part.startswith('[]')
+        if self._empty_shift:
+            # we abuse ':' as a separator between the lexical item and its features, e.g., shift([]:[=v,c])
+            self.empty_features = tuple(parse_features(self.inner_part.split(':')[1].strip('[]')))
+        elif not self._shift:
+            self.inner = InnerKind(self.inner_part)
+
     def parse_rule(self):
         rule_str = self.raw_rule
 
@@ -33,7 +76,7 @@ class LCRule:
             self.inner_part = split[1].rstrip(')')
 
     def is_shift(self) -> bool:
-        return self.lc_rule == 'shift'
+        return self._shift
 
     def is_empty_shift(self) -> bool:
         """
@@ -42,21 +85,19 @@ class LCRule:
         This is opposed to a shift rule that operates on a non-empty lexical item, e.g., shift([Aca]),
         which is taken from the remaining input during parsing.
         """
-        return self.is_shift() and self.inner_part.startswith('[]')
+        return self._empty_shift
 
     def is_lc(self) -> bool:
-        return not self.is_shift()
+        return not self._shift
 
     def is_comp(self) -> bool:
-        return self.comp_rule != ''
+        return self.comp is not None
 
-    def set_inner_part(self, inner_part):
-        """
-        Sets the inner part of the rule.
-        This is mainly used for SHIFT rules, since we want to store the features of the shift:
-        e.g., shift([], [=v,c]) will have the inner part as '[], [=v,c]'
-        """
-        self.inner_part = inner_part
+    def __eq__(self, other):
+        return isinstance(other, LCRule) and self.raw_rule == other.raw_rule
+
+    def __hash__(self):
+        return hash(self.raw_rule)
 
     def __str__(self):
         return self.raw_rule
@@ -91,7 +132,7 @@ if __name__ == '__main__':
     print(lcr4.is_lc())
     print(lcr4.is_comp())
 
-    lcr5 = LCRule('shift([], [=v,c])')
+    lcr5 = LCRule('shift([]:[=v,c])')
     print(repr(lcr5))
     print(lcr5.is_shift())
     print(lcr5.is_lc())
@@ -0,0 +1,105 @@
+"""
+Defines the (opt-in) statistics collector of the lc parser: which rules are applied, why they fail, where the time
+goes and how large the search gets. Pass one to LCParser(grammar, stats=ParseStats()); it accumulates over all the
+parses of the parser, and is exported with to_json().
+"""
+import json
+from collections import Counter
+from time import perf_counter
+
+# the reasons a rule application fails
+CONDITION = 'condition'  # the shift or lc part does not apply (e.g., no word left, the focus has the wrong features)
+COMPOSITION = 'composition'  # no partner in the queue to compose the result with
+ORACLE = 'oracle'  # the result is pruned by the left-corner oracle
+SKIPPED = 'skipped'  # the search does not try the rule (a repeated or unsupported empty shift, a shift after a shift)
+FAILURE_REASONS = (CONDITION, COMPOSITION, ORACLE, SKIPPED)
+
+# the timed operations of the parser
+TIMED_OPERATIONS = ('lc', 'comp', 'select', 'shift')
+
+
+class RuleStats:
+    __slots__ = ('attempts', 'successes', 'failures')
+
+    def __init__(self):
+        self.attempts = 0
+        self.successes = 0
+        self.failures = dict.fromkeys(FAILURE_REASONS, 0)
+
+    def to_dict(self) -> dict:
+        return {'attempts': self.attempts, 'successes': self.successes, 'failures': dict(self.failures)}
+
+
+class ParseStats:
+    def __init__(self):
+        self.rules: dict[str, RuleStats] = {}
+        self.times = dict.fromkeys(TIMED_OPERATIONS, 0.0)  # operation -> seconds (comp includes its select)
+        self.calls = dict.fromkeys(TIMED_OPERATIONS, 0)
+        self.searches = 0
+        self.configurations = 0  # popped configurations
+        self.max_stack = 0  # the high-water mark of the stack (agenda)
+        self.queue_lengths = Counter()  # the queue length of the popped configurations -> count
+
+    def get_rule(self, rule) -> RuleStats:
+        key = str(rule)
+        stats = self.rules.get(key)
+        if stats is None:
+            stats = self.rules[key] = RuleStats()
+        return stats
+
+    def record(self, rule, reason: str = None):
+        """
+        Records an application of the rule: successful if no reason for its failure is given.
+        """
+        stats = self.get_rule(rule)
+        stats.attempts += 1
+        if reason is None:
+            stats.successes += 1
+        else:
+            stats.failures[reason] += 1
+
+    def record_pop(self, stack_size: int, queue_length: int):
+        """
+        Records a configuration popped from the stack, with the stack size before the pop.
+        """
+        self.configurations += 1
+        if stack_size > self.max_stack:
+            self.max_stack = stack_size
+        self.queue_lengths[queue_length] += 1
+
+    def timed(self, operation: str, function):
+        """
+        Wraps the function, adding the time of each call to the operation.
+        """
+        times, calls = self.times, self.calls
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                times[operation] += perf_counter() - start
+                calls[operation] += 1
+
+        return wrapper
+
+    def to_dict(self) -> dict:
+        return {
+            'searches': self.searches,
+            'configurations': self.configurations,
+            'max_stack': self.max_stack,
+            'queue_lengths': {str(length): count for length, count in sorted(self.queue_lengths.items())},
+            'times': {op: round(seconds, 6) for op, seconds in self.times.items()},
+            'calls': dict(self.calls),
+            'rules': {rule: stats.to_dict() for rule, stats in self.rules.items()},
+        }
+
+    def to_json(self, path: str = None) -> str:
+        """
+        Exports the statistics as JSON, also writing them to the file if a path is given.
+        """
+        data = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as file:
+                file.write(data)
+        return data
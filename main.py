@@ -7,7 +7,7 @@ from test_g1 import *
 
 def test_g1(manual=False):
     g1 = MG('input/g1.json') # suitable for input1 and input2
-    parser = LCParser(g1)
+    parser = LCParser(g1, trace=True, trace_stack=True)
     input1 = ['Aca', 'knows', 'what', 'Bibi', 'likes']
     input2 = ['Bibi', 'likes', 'Aca']
     input3 = ['Aca', 'likes', 'Bibi', 'and', 'Bibi', 'likes', 'Aca']
@@ -16,8 +16,8 @@ def test_g1(manual=False):
         test_g1_input2_manual(parser, input2)
         test_g1_input3_manual(parser, input3)
     else:
-        test_g1_input(parser, input1)
-        test_g1_input(parser, input2)
+        parse_g1_input(parser, input1)
+        parse_g1_input(parser, input2)
 
 if __name__ == '__main__':
     print('Welcome to the MG Left Corner Parser!')
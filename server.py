@@ -0,0 +1,202 @@
+"""
+Runs the lc parser as a resident server, keeping the grammars loaded (and their rules compiled) between requests.
+Requests are JSON lines, read from stdin or from the connections to a Unix socket; they are handled concurrently
+(asyncio), the parsing itself runs on a pool of worker processes, and each response is written as soon as it is ready.
+
+Usage:
+    python server.py --grammar g1=input/g1.json                          # over stdin/stdout
+    python server.py --grammar g1=input/g1.json --socket /tmp/lc.sock    # over a Unix socket
+
+Request:  {"id": 1, "grammar": "g1", "sentence": ["Bibi", "likes", "Aca"], "max_results": 10, "engine": "stack",
+           "timeout": 5.0, "max_configs": 100000, "empty_shifts": "repeat", "deepening": true}
+          (only the sentence is required; the grammar defaults to the first one, "count": true only counts them,
+           answering the count and the status; the limits are the fields of lc.lc_parser.Budget; "empty_shifts" and
+           "deepening" as in LCParser.parse())
+Response: {"id": 1, "count": 1, "status": "complete", "results": [{"config": "...", "rules": ["shift([]:[=v,c])", ...]}]}
+          or {"id": 1, "error": "..."}
+"""
+import argparse
+import asyncio
+import json
+import os
+import stat
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from grammar.mg import MG
+from lc.lc_parser import LCParser, Budget
+
+BUDGET_FIELDS = ('timeout', 'max_configs', 'max_stack', 'max_memory')
+
+# the parsers of a worker process, by grammar id
+_parsers: dict[str, LCParser] = {}
+
+
+def _init_worker(grammars: dict[str, str], cache: bool):
+    for grammar_id, path in grammars.items():
+        _parsers[grammar_id] = LCParser(MG(path, cache=cache))
+
+
+def _parse_request(grammar_id: str, sentence: list[str], count: bool, max_results: int, engine: str,
+                   budget: Budget, empty_shifts, deepening: bool) -> dict:
+    parser = _parsers[grammar_id]
+    if count:
+        forest = parser.parse_forest(sentence, engine=engine, budget=budget, empty_shifts=empty_shifts)
+        return {'count': forest.count(), 'status': forest.status.value}
+    results, status, _ = parser.parse_with_status(sentence, max_results=max_results, engine=engine, budget=budget,
+                                                  empty_shifts=empty_shifts, deepening=deepening)
+    return {
+        'count': len(results),
+        'status': status.value,
+        'results': [{'config': str(config), 'rules': [str(rule) for rule in rules]} for config, rules in results],
+    }
+
+
+class ParseServer:
+    def __init__(self, grammars: dict[str, str], workers: int = None, cache=False):
+        """
+        :param grammars: The grammar files, by grammar id.
+        :param workers: The number of worker processes (default: the number of cores).
+        :param cache: Load the compiled grammars from their caches (see MG).
+        """
+        self.grammars = grammars
+        self.default_grammar = next(iter(grammars))
+        self.workers = workers
+        self.cache = cache
+        self.pool = self.new_pool()
+
+    def new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.grammars, self.cache))
+
+    def restart_pool(self, pool: ProcessPoolExecutor):
+        """
+        Replaces the pool after one of its worker processes died (e.g., killed out of memory), which breaks it for all
+        later requests. The requests that failed with it restart it once: only if it is still the current pool.
+        """
+        if self.pool is pool:
+            pool.shutdown(wait=False)
+            self.pool = self.new_pool()
+
+    async def handle(self, line: str) -> dict:
+        """
+        Handles a request line, returning its response.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {'error': f"Bad request: {e!r}"}
+        if not isinstance(request, dict):
+            return {'error': "Bad request: expected an object"}
+        response = {'id': request.get('id')}
+        pool = self.pool
+        try:
+            grammar_id, sentence, budget = self.read_request(request)
+            response |= await asyncio.get_running_loop().run_in_executor(
+                pool, _parse_request, grammar_id, sentence, request.get('count', False),
+                request.get('max_results'), request.get('engine', 'stack'), budget, request.get('empty_shifts', 'once'),
+                request.get('deepening', False))
+        except BrokenProcessPool as e:
+            # a worker died while parsing this request (or another one in the pool)
+            self.restart_pool(pool)
+            response['error'] = repr(e)
+        except Exception as e:
+            response['error'] = repr(e)
+        return response
+
+    def read_request(self, request: dict) -> tuple[str, list[str], Budget]:
+        """
+        Validates the grammar, the sentence and the limits of a request.
+        :return: The grammar id, the sentence and the budget (None without limits).
+        """
+        grammar_id = request.get('grammar', self.default_grammar)
+        if not isinstance(grammar_id, str) or grammar_id not in self.grammars:
+            raise ValueError(f"Unknown grammar: {grammar_id!r}, expected one of {list(self.grammars)}")
+        sentence = request.get('sentence')
+        if not isinstance(sentence, list) or not all(isinstance(word, str) for word in sentence):
+            raise ValueError(f"Bad sentence: {sentence!r}, expected a list of words")
+        limits = {name: request[name] for name in BUDGET_FIELDS if request.get(name) is not None}
+        for name, limit in limits.items():
+            if isinstance(limit, bool) or not isinstance(limit, (int, float)) or limit < 0:
+                raise ValueError(f"Bad {name}: {limit!r}, expected a non-negative number")
+        return grammar_id, sentence, Budget(**limits) if limits else None
+
+    async def serve(self, reader: asyncio.StreamReader, write):
+        """
+        Serves the requests read from the stream until its end; write(line) sends a response line.
+        """
+        tasks = set()
+
+        async def respond(line):
+            await write(json.dumps(await self.handle(line)) + '\n')
+
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            task = asyncio.create_task(respond(line.decode()))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+
+    async def serve_stdin(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        async def write(line):
+            sys.stdout.write(line)
+            sys.stdout.flush()
+
+        await self.serve(reader, write)
+
+    async def serve_socket(self, path: str):
+        async def connected(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            async def write(line):
+                writer.write(line.encode())
+                await writer.drain()
+
+            try:
+                await self.serve(reader, write)
+            finally:
+                writer.close()
+
+        server = await asyncio.start_unix_server(connected, path)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def main(args=None):
+    arg_parser = argparse.ArgumentParser(description='Serves the lc parser over JSON lines (stdin or a Unix socket).')
+    arg_parser.add_argument('--grammar', action='append', required=True, metavar='ID=FILE',
+                            help='a grammar to keep loaded (repeat for several), the first one is the default')
+    arg_parser.add_argument('--socket', help='listen on this Unix socket instead of stdin')
+    arg_parser.add_argument('--workers', type=int, help='the number of worker processes (default: the number of cores)')
+    arg_parser.add_argument('--cache', action='store_true',
+                            help='cache the compiled grammars next to their files (only for trusted directories)')
+    options = arg_parser.parse_args(args)
+
+    grammars = dict(grammar.split('=', 1) for grammar in options.grammar)
+    if options.cache:
+        for path in grammars.values():
+            MG(path, cache=True)  # compiles (and caches) each grammar once, before the workers load it
+    server = ParseServer(grammars, options.workers, options.cache)
+    try:
+        if options.socket:
+            # a socket left by a previous run; any other file is left alone (start_unix_server then fails)
+            if os.path.exists(options.socket) and stat.S_ISSOCK(os.stat(options.socket).st_mode):
+                os.remove(options.socket)
+            asyncio.run(server.serve_socket(options.socket))
+        else:
+            asyncio.run(server.serve_stdin())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Checks the agendas of the approximate and scored engines: the beam bounds the configurations entering each position,
+and the best-first agenda expands by score (e.g., rule_weights()) without changing the derivations found.
+"""
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+
+from lc.lc_agenda import BeamAgenda, PriorityAgenda, rule_weights
+
+
+def derivations(results) -> list[str]:
+    return sorted(str(config) + str(rules) for config, rules in results)
+
+
+def fake_node(pos: int, score: float):
+    return SimpleNamespace(config=SimpleNamespace(current_pos=pos), score=score)
+
+
+def by_score(node) -> float:
+    return node.score
+
+
+def test_beam_bounds_entering_configurations():
+    beam = BeamAgenda(width=2, score=by_score)
+    beam.push((0, 'root'), fake_node(0, 0))
+    for score in (1, 3, 2, 0):
+        beam.push((1, score), fake_node(1, score))
+    assert beam.lookup((1, 1)) is None and beam.lookup((1, 0)) is None
+    assert beam.pop().config.current_pos == 0
+    assert [beam.pop().score for _ in range(2)] == [3, 2]
+    # the steps that do not consume input are all kept
+    for score in range(5):
+        beam.push((1, 'step', score), fake_node(1, score))
+    assert len(beam) == 5
+
+
+@pytest.mark.parametrize('sentence', [
+    ['Bibi', 'likes', 'Aca'],
+    ['Aca', 'knows', 'what', 'Bibi', 'likes'],
+])
+def test_beam(parser, sentence):
+    full = parser.parse_with_status(sentence)
+    # wide enough to keep every configuration entering a position: the search is exhaustive
+    wide = parser.parse_with_status(sentence, engine=partial(BeamAgenda, width=1000))
+    assert derivations(wide.results) == derivations(full.results)
+    assert wide.config_count == full.config_count
+    # narrower: a subset of the derivations, for less work
+    for width in (1, 2, 4):
+        narrow = parser.parse_with_status(sentence, engine=partial(BeamAgenda, width=width))
+        assert set(derivations(narrow.results)) <= set(derivations(full.results))
+        assert narrow.config_count < full.config_count
+
+
+def test_beam_width(parser, input2):
+    assert parser.parse(input2, engine=partial(BeamAgenda, width=1)) == []
+    assert len(parser.parse(input2, engine=partial(BeamAgenda, width=2))) == 1
+
+
+def test_priority_order():
+    agenda = PriorityAgenda(score=by_score)
+    for key, score in enumerate((1, 3, 1, 2)):
+        agenda.push(key, fake_node(0, score))
+    popped = [agenda.pop() for _ in range(4)]
+    assert [node.score for node in popped] == [3, 2, 1, 1]
+    assert popped[2] is agenda.lookup(0)  # ties in the push order
+
+
+def test_rule_weights():
+    score = rule_weights({'shift': 1.0, 'lc1(merge1)': -0.5})
+    node = SimpleNamespace(get_rules=lambda: ['shift', 'lc1(merge1)', 'shift', 'c(shift)'])
+    assert score(node) == 1.5
+
+
+def test_best_with_rule_weights(parser, input1):
+    # the score only changes the order of the search, not the derivations found
+    expected = derivations(parser.parse(input1))
+    for weights in ({}, {'shift': 1.0}, {'c1(lc2(merge2))': 2.0, 'shift([]:[=v,c])': -1.0}):
+        engine = partial(PriorityAgenda, score=rule_weights(weights))
+        assert derivations(parser.parse(input1, engine=engine)) == expected
@@ -0,0 +1,92 @@
+"""
+Checks parse_batch(): the results of the worker processes match parse(), in order or as they complete, and a failing
+sentence (raising, or killing its worker process) only fails itself.
+"""
+import os
+
+import pytest
+
+import lc.lc_parser
+from lc.lc_parser import BatchResult
+
+SENTENCES = [
+    ['Aca', 'knows', 'what', 'Bibi', 'likes'],
+    ['Bibi', 'likes', 'Aca'],
+    ['Aca', 'likes'],
+    ['Aca', 'knows', 'Bibi', 'likes', 'Aca'],
+    ['Bibi', 'likes', 'Bibi'],
+]
+
+_parse_in_worker = lc.lc_parser._parse_in_worker
+FAILURES = {'crash', 'fail', 'once'}
+
+
+def words(sentence: list[str]) -> list[str]:
+    return [word for word in sentence if word not in FAILURES]
+
+
+def failing_parse_in_worker(sentence: list[str], kwargs: dict) -> list:
+    # 'crash' kills the worker process and 'fail' raises; with 'once', only on the first attempt (it leaves a marker)
+    if 'once' in sentence:
+        marker = os.path.join(os.environ['LC_TEST_MARKERS'], '-'.join(sentence))
+        if os.path.exists(marker):
+            return _parse_in_worker(words(sentence), kwargs)
+        open(marker, 'w').close()
+    if 'crash' in sentence:
+        os._exit(1)
+    if 'fail' in sentence:
+        raise ValueError(f"Cannot parse {sentence}")
+    return _parse_in_worker(words(sentence), kwargs)
+
+
+@pytest.fixture
+def failing_worker(monkeypatch, tmp_path):
+    # the worker processes are forked after the patch, and inherit it
+    monkeypatch.setattr(lc.lc_parser, '_parse_in_worker', failing_parse_in_worker)
+    monkeypatch.setenv('LC_TEST_MARKERS', str(tmp_path))
+
+
+def check_results(parser, results: list[BatchResult], sentences: list[list[str]], failed=()):
+    assert sorted(result.index for result in results) == list(range(len(sentences)))
+    for result in results:
+        assert result.sentence == sentences[result.index]
+        if result.index in failed:
+            assert result.results == [] and result.error is not None
+        else:
+            assert result.error is None
+            assert result.results == parser.parse(words(result.sentence))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_ordered(parser, workers):
+    results = list(parser.parse_batch(SENTENCES, workers=workers))
+    assert [result.index for result in results] == list(range(len(SENTENCES)))
+    check_results(parser, results, SENTENCES)
+
+
+def test_unordered(parser):
+    check_results(parser, list(parser.parse_batch(SENTENCES, workers=2, ordered=False)), SENTENCES)
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_error(parser, failing_worker, ordered):
+    sentences = SENTENCES[:2] + [['fail']] + SENTENCES[2:]
+    results = list(parser.parse_batch(sentences, workers=2, ordered=ordered, retries=1))
+    check_results(parser, results, sentences, failed={2})
+    assert next(result for result in results if result.index == 2).error.startswith('ValueError')
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_crash(parser, failing_worker, ordered):
+    sentences = SENTENCES[:2] + [['crash']] + SENTENCES[2:]
+    results = list(parser.parse_batch(sentences, workers=2, ordered=ordered))
+    check_results(parser, results, sentences, failed={2})
+    assert next(result for result in results if result.index == 2).error.startswith('BrokenProcessPool')
+
+
+@pytest.mark.parametrize('failure', ['crash', 'fail'])
+def test_retries(parser, failing_worker, failure):
+    sentences = SENTENCES[:2] + [['once', failure, 'Bibi', 'likes', 'Aca']] + SENTENCES[2:]
+    results = list(parser.parse_batch(sentences, workers=2, retries=1))
+    check_results(parser, results, sentences)
+    assert len(results[2].results) == 1
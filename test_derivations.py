@@ -0,0 +1,61 @@
+"""
+Checks that the ways of getting the derivations of a sentence agree: parse(), parse_iter(), the packed forest (enumerated
+and picked by index) and count_parses(), on every exhaustive engine. The derivations completed by a late merge (an
+equivalent configuration reached again) are rebuilt from the merge events, which is where they could disagree.
+"""
+import pytest
+
+from lc.lc_parser import LCParser, Budget, ParseStatus
+
+ENGINES = ['stack', 'queue', 'best']
+
+
+def derivations(results) -> list[str]:
+    return sorted(str(config) + str(rules) for config, rules in results)
+
+
+def check_agreement(parser: LCParser, sentence: list[str], expected: int):
+    found = None
+    for engine in ENGINES:
+        results = parser.parse(sentence, engine=engine)
+        assert len(results) == expected
+        assert derivations(parser.parse_iter(sentence, engine=engine)) == derivations(results)
+        forest = parser.parse_forest(sentence, engine=engine)
+        assert forest.count() == expected
+        assert [forest.get(i) for i in range(forest.count())] == list(forest)
+        assert derivations(forest) == derivations(results)
+        assert parser.count_parses(sentence, engine=engine) == expected
+        if found is not None:
+            assert derivations(results) == found
+        found = derivations(results)
+
+
+def test_g1_input1(parser, input1):
+    check_agreement(parser, input1, 1)
+
+
+def test_g1_input2(parser, input2):
+    check_agreement(parser, input2, 1)
+
+
+@pytest.mark.parametrize('sentence, expected', [
+    (['Bibi', 'likes', 'Aca'], 2),
+    (['Aca', 'likes', 'Bibi'], 2),
+    (['Aca', 'knows', 'what', 'Aca', 'likes'], 4),
+])
+def test_ambiguous(ambiguous_parser, sentence, expected):
+    check_agreement(ambiguous_parser, sentence, expected)
+
+
+def test_max_results(ambiguous_parser):
+    sentence = ['Aca', 'knows', 'what', 'Aca', 'likes']
+    results = ambiguous_parser.parse(sentence)
+    assert ambiguous_parser.parse(sentence, max_results=3) == results[:3]
+
+
+def test_forest_budget(ambiguous_parser):
+    sentence = ['Aca', 'knows', 'what', 'Aca', 'likes']
+    assert ambiguous_parser.parse_forest(sentence).status is ParseStatus.COMPLETE
+    forest = ambiguous_parser.parse_forest(sentence, budget=Budget(max_configs=10))
+    assert forest.status is ParseStatus.MAX_CONFIGS
+    assert forest.count() == ambiguous_parser.count_parses(sentence, budget=Budget(max_configs=10)) == 0
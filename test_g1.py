@@ -19,7 +19,7 @@ def test_g1_input1_manual(parser, input1):
         LCRule('c(shift)'),
         LCRule('c(lc1(move1))'),
     ]
-    test_g1_input(parser, input1, rules=rules1, manual=True)
+    parse_g1_input(parser, input1, rules=rules1, manual=True)
 
 
 def test_g1_input2_manual(parser, input2):
@@ -32,7 +32,7 @@ def test_g1_input2_manual(parser, input2):
         LCRule('c1(lc1(merge1))'),
         LCRule('c(shift)'),
     ]
-    test_g1_input(parser, input2, rules=rules2, manual=True)
+    parse_g1_input(parser, input2, rules=rules2, manual=True)
 
 
 def test_g1_input3_manual(parser, input3):
@@ -55,10 +55,10 @@ def test_g1_input3_manual(parser, input3):
         LCRule('c1(lc1(merge1))'),
         LCRule('c(shift)')
     ]
-    test_g1_input(parser, input3, rules=rules3, manual=True)
+    parse_g1_input(parser, input3, rules=rules3, manual=True)
 
 
-def test_g1_input(parser, inp, rules=None, manual=False):
+def parse_g1_input(parser, inp, rules=None, manual=False):
     results = parser.parse(inp, rules=rules, manual=manual)
     sleep(0.1)
     print(f"Results: {results}")
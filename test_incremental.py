@@ -0,0 +1,48 @@
+"""
+Checks that feeding the words one at a time (IncrementalParser) and parsing a batch over its shared prefixes
+(parse_shared()) find the same derivations as parse(), with each way of applying the empty shifts.
+"""
+import pytest
+
+from lc.lc_incremental import IncrementalParser, parse_shared
+from lc.lc_rule import LCRule
+
+
+def derivations(results) -> list[str]:
+    return sorted(str(config) + str(rules) for config, rules in results)
+
+
+def feed_all(incremental: IncrementalParser, sentence: list[str]) -> list:
+    for word in sentence:
+        incremental.feed(word)
+    return incremental.results()
+
+
+@pytest.mark.parametrize('empty_shifts', ['once', 'repeat', 2])
+def test_feed(parser, input1, input2, empty_shifts):
+    for sentence in (input1, input2):
+        expected = parser.parse(sentence, empty_shifts=empty_shifts)
+        assert len(expected) == 1
+        incremental = IncrementalParser(parser, empty_shifts=empty_shifts)
+        assert derivations(feed_all(incremental, sentence)) == derivations(expected)
+
+
+@pytest.mark.parametrize('empty_shifts', ['once', 'repeat', 2])
+def test_parse_shared(parser, input1, input2, empty_shifts):
+    sentences = [input1, input2, input2[:2], ['Aca', 'knows', 'Bibi', 'likes', 'Aca']]
+    shared = parse_shared(parser, sentences, empty_shifts=empty_shifts)
+    for sentence, results in zip(sentences, shared):
+        assert derivations(results) == derivations(parser.parse(sentence, empty_shifts=empty_shifts))
+
+
+def test_repeated_empty_shifts(parser, input3):
+    # the coordinated clauses need an empty [=v,c] head each
+    rules = list(parser.parsing_rules) + [LCRule('lc2(merge2)')]
+    assert parser.parse(input3, rules) == []
+    expected = parser.parse(input3, rules, empty_shifts='repeat')
+    assert len(expected) == 1
+    incremental = IncrementalParser(parser, rules, empty_shifts='repeat', expected=[input3])
+    assert derivations(feed_all(incremental, input3)) == derivations(expected)
+    shared = parse_shared(parser, [input3, input3[:3]], rules, empty_shifts='repeat')
+    assert derivations(shared[0]) == derivations(expected)
+    assert derivations(shared[1]) == derivations(parser.parse(input3[:3], rules, empty_shifts='repeat'))
@@ -0,0 +1,49 @@
+"""
+Checks the lexicon indexes of the grammar (MG.build_indexes) and that shift branches over every reading of an
+ambiguous word.
+"""
+import json
+
+import pytest
+
+from conftest import G1
+from grammar.mg import MG
+from lc.lc_configuration import EMPTY_QUEUE
+from lc.lc_parser import LCParser, Configuration
+from lc.lc_rule import LCRule
+
+
+@pytest.fixture(scope='module')
+def ambiguous_verb_parser(tmp_path_factory):
+    # likes is transitive (=d,=d,v) or intransitive (=d,v, its complement on the right)
+    with open(G1) as file:
+        grammar = json.load(file)
+    grammar['lexicon']['likes'] = ['=d,=d,v', '=d,v']
+    path = tmp_path_factory.mktemp('grammar') / 'ambiguous_verb.json'
+    path.write_text(json.dumps(grammar))
+    return LCParser(MG(str(path)))
+
+
+def test_indexes(g1):
+    assert [str(item) for item in g1.get_lexicon_items('likes')] == ["'likes' :: (=d, =d, v)"]
+    assert g1.get_lexicon_items('Zed') == [] and g1.get_lexicon_item('Zed') is None
+    assert [str(item) for item in g1.empty_items] == ["'' :: (=v, c)", "'' :: (=v, +wh, c)"]
+    # the feature after the last selector of each selectee: likes (=d,=d,v), knows (=c,=d,v), and (=c,=c,c), ...
+    assert [str(f) for f in g1.get_gammas('d')] == ['v']
+    assert [str(f) for f in g1.get_gammas('c')] == ['=d', 'c']
+    assert [str(f) for f in g1.get_gammas('v')] == ['c', '+wh']
+
+
+def test_shift_branches(ambiguous_verb_parser):
+    shift = ambiguous_verb_parser.compile_rule(LCRule('shift'))
+    config = Configuration(1, ('likes', 'Aca'), EMPTY_QUEUE)
+    readings = ambiguous_verb_parser.get_rule_vars(shift, config)
+    assert [str(item) for item in readings] == ["'likes' :: (=d, =d, v)", "'likes' :: (=d, v)"]
+    assert len({str(ambiguous_verb_parser.apply_rule(shift, config, var=item)) for item in readings}) == 2
+
+
+@pytest.mark.parametrize('sentence', [['Bibi', 'likes', 'Aca'], ['likes', 'Bibi']])
+def test_ambiguous_word(ambiguous_verb_parser, parser, sentence):
+    # each sentence needs one of the readings of likes
+    assert len(ambiguous_verb_parser.parse(sentence)) == 1
+    assert len(parser.parse(sentence)) == (1 if len(sentence) == 3 else 0)
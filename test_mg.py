@@ -0,0 +1,77 @@
+"""
+Checks the cache of the compiled grammar: it is only written on request, and only loaded when it is fresh (same content
+hash) and trusted (owned by the current user, writable by no one else); otherwise the JSON is compiled again.
+"""
+import json
+import os
+import shutil
+
+import pytest
+
+from conftest import G1
+from grammar.mg import MG, CACHE_SUFFIX
+
+
+@pytest.fixture
+def grammar_file(tmp_path):
+    path = str(tmp_path / 'g1.json')
+    shutil.copy(G1, path)
+    return path
+
+
+@pytest.fixture
+def compiles(monkeypatch):
+    # counts the grammars compiled from their JSON (rather than loaded from their cache)
+    calls = []
+    parse_json = MG.parse_json
+
+    def counting_parse_json(self, data):
+        calls.append(data)
+        parse_json(self, data)
+
+    monkeypatch.setattr(MG, 'parse_json', counting_parse_json)
+    return calls
+
+
+def test_no_cache_by_default(grammar_file):
+    MG(grammar_file)
+    assert not os.path.exists(grammar_file + CACHE_SUFFIX)
+
+
+def test_cache(grammar_file, compiles):
+    grammar = MG(grammar_file, cache=True)
+    assert os.stat(grammar_file + CACHE_SUFFIX).st_mode & 0o777 == 0o600
+    cached = MG(grammar_file, cache=True)
+    assert len(compiles) == 1
+    assert cached.link_relations == grammar.link_relations
+    assert [str(item) for item in cached.lexicon] == [str(item) for item in grammar.lexicon]
+
+
+def test_stale_cache(grammar_file, compiles):
+    MG(grammar_file, cache=True)
+    with open(grammar_file) as file:
+        data = json.load(file)
+    data['lexicon']['Cece'] = ['d']
+    with open(grammar_file, 'w') as file:
+        json.dump(data, file)
+    grammar = MG(grammar_file, cache=True)
+    assert len(compiles) == 2
+    assert grammar.get_lexicon_item('Cece') is not None
+    # the cache was written again, for the new content
+    assert MG(grammar_file, cache=True).get_lexicon_item('Cece') is not None
+    assert len(compiles) == 2
+
+
+@pytest.mark.parametrize('mode', [0o620, 0o602, 0o666])
+def test_writable_cache(grammar_file, compiles, mode):
+    MG(grammar_file, cache=True)
+    os.chmod(grammar_file + CACHE_SUFFIX, mode)
+    MG(grammar_file, cache=True)
+    assert len(compiles) == 2
+
+
+def test_foreign_cache(grammar_file, compiles, monkeypatch):
+    MG(grammar_file, cache=True)
+    monkeypatch.setattr(os, 'getuid', lambda: os.stat(grammar_file).st_uid + 1)
+    MG(grammar_file, cache=True)
+    assert len(compiles) == 2
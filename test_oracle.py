@@ -0,0 +1,49 @@
+"""
+Checks the left-corner oracle (MG.compute_link_relations, LCParser.oracle_ok): it only prunes configurations that lead
+to no derivation (the derivations are the same without it), and it does prune (fewer configurations are popped).
+"""
+import pytest
+
+from benchmark.generators import SentenceGenerator, generate_grammar, write_grammar
+from grammar.mg import MG
+from lc.lc_parser import LCParser
+
+
+def derivations(results) -> list[str]:
+    return sorted(str(config) + str(rules) for config, rules in results)
+
+
+def check_oracle(grammar: MG, sentence: list[str], empty_shifts='once'):
+    parser, unpruned = LCParser(grammar), LCParser(grammar)
+    unpruned.oracle_ok = lambda *args: True
+    pruned_results, _, pruned_count = parser.parse_with_status(sentence, empty_shifts=empty_shifts)
+    results, _, count = unpruned.parse_with_status(sentence, empty_shifts=empty_shifts)
+    assert derivations(pruned_results) == derivations(results)
+    assert pruned_count < count
+    return pruned_results
+
+
+@pytest.mark.parametrize('sentence', [
+    ['Aca', 'knows', 'what', 'Bibi', 'likes'],
+    ['Bibi', 'likes', 'Aca'],
+    ['Aca', 'likes', 'Bibi', 'and', 'Bibi', 'likes', 'Aca'],
+    ['likes', 'Aca', 'Bibi'],
+])
+def test_g1(g1, sentence):
+    check_oracle(g1, sentence)
+
+
+@pytest.mark.parametrize('empty_shifts', ['once', 'repeat'])
+@pytest.mark.parametrize('ambiguity, family', [
+    (0, 'embedding'), (0, 'coordination'), (0, 'wh'),
+    (1, 'embedding'), (1, 'wh'),
+    (2, 'embedding'), (2, 'wh'),
+])
+def test_generated(tmp_path, ambiguity, family, empty_shifts):
+    grammar, vocabulary = generate_grammar(2, ambiguity)
+    path = str(tmp_path / 'grammar.json')
+    write_grammar(grammar, path)
+    sentence = SentenceGenerator(vocabulary, seed=1).generate(family, 1)
+    results = check_oracle(MG(path), sentence, empty_shifts)
+    if empty_shifts == 'repeat':
+        assert results
@@ -0,0 +1,28 @@
+"""
+Checks that parse_parallel() finds the derivations of parse(), however the search is split between the workers.
+"""
+import pytest
+
+
+def derivations(results) -> list[str]:
+    return sorted(str(config) + str(rules) for config, rules in results)
+
+
+@pytest.mark.parametrize('workers, split', [(2, 1), (2, 4), (3, 2)])
+@pytest.mark.parametrize('sentence', [
+    ['Aca', 'knows', 'what', 'Aca', 'likes'],
+    ['Bibi', 'likes', 'Aca'],
+])
+def test_parallel(ambiguous_parser, sentence, workers, split):
+    expected = ambiguous_parser.parse(sentence)
+    assert expected
+    assert derivations(ambiguous_parser.parse_parallel(sentence, workers, split=split)) == derivations(expected)
+
+
+@pytest.mark.parametrize('sentence, count', [(['Bibi', 'likes', 'Aca'], 2), (['Zed', 'likes'], 0)])
+def test_frontier_exhausted(ambiguous_parser, monkeypatch, sentence, count):
+    # the search ends before the frontier is large enough to start the pool
+    monkeypatch.setattr('lc.lc_parser.LCParser._new_pool', None)
+    results = ambiguous_parser.parse_parallel(sentence, 2, split=1000)
+    assert len(results) == count
+    assert derivations(results) == derivations(ambiguous_parser.parse(sentence))
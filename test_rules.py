@@ -0,0 +1,44 @@
+"""
+Regression tests of the lc rules.
+"""
+import json
+
+import pytest
+
+from conftest import G1
+from grammar.mg import MG
+from lc.lc_parser import LCParser
+
+
+@pytest.mark.parametrize('sentence', [
+    ['likes', 'likes', 'Aca'],
+    ['likes', 'Aca', 'likes', 'Aca'],
+])
+def test_lc2_merge2_needs_a_complete_left_corner(parser, sentence):
+    # lc2(merge2) used to take a selector head (likes :: =d,=d,v) as the specifier d
+    assert parser.parse(sentence) == []
+
+
+def test_lc2_merge2_complete_left_corner(parser, input2):
+    # Bibi :: d is the specifier of likes
+    assert len(parser.parse(input2)) == 1
+
+
+@pytest.fixture(scope='module')
+def clausal_subject_parser(tmp_path_factory):
+    with open(G1) as file:
+        grammar = json.load(file)
+    grammar['lexicon'] = {'': ['=v,c'], 'Aca': ['d'], 'Bibi': ['d'], 'likes': ['=d,=d,v'], 'surprises': ['=d,=c,v']}
+    grammar['rules'].append('lc2(merge2)')
+    path = tmp_path_factory.mktemp('grammar') / 'clausal_subject.json'
+    path.write_text(json.dumps(grammar))
+    return LCParser(MG(str(path)))
+
+
+@pytest.mark.parametrize('empty_shifts', ['repeat', 2])
+def test_repeated_empty_shift_at_a_position(clausal_subject_parser, empty_shifts):
+    # the subject clause [c Aca likes Bibi] and the main clause each need an empty [=v,c], both shifted at position 0
+    results = clausal_subject_parser.parse(['Aca', 'likes', 'Bibi', 'surprises', 'Aca'], empty_shifts=empty_shifts)
+    assert len(results) == 1
+    _, rules = results[0]
+    assert [str(rule) for rule in rules[:3]] == ['shift([]:[=v,c])', 'lc1(merge1)', 'shift([]:[=v,c])']
@@ -0,0 +1,76 @@
+"""
+Checks the request handling of the parse server: the validation of the requests, the responses, and the recovery of the
+worker pool after a worker process dies.
+"""
+import asyncio
+import json
+import os
+
+import pytest
+
+import server
+from conftest import G1
+from server import ParseServer
+
+_parse_request = server._parse_request
+
+
+def crashing_parse_request(grammar_id: str, sentence: list[str], *args) -> dict:
+    if sentence == ['crash']:
+        os._exit(1)
+    return _parse_request(grammar_id, sentence, *args)
+
+
+@pytest.fixture
+def parse_server():
+    parse_server = ParseServer({'g1': G1}, workers=1)
+    yield parse_server
+    parse_server.close()
+
+
+def handle(parse_server: ParseServer, request) -> dict:
+    return asyncio.run(parse_server.handle(request if isinstance(request, str) else json.dumps(request)))
+
+
+@pytest.mark.parametrize('request_, error', [
+    ({'id': 1, 'grammar': ['g1'], 'sentence': ['Aca']}, 'Unknown grammar'),
+    ({'id': 1, 'grammar': 'g2', 'sentence': ['Aca']}, 'Unknown grammar'),
+    ({'id': 1, 'sentence': 'Bibi likes Aca'}, 'Bad sentence'),
+    ({'id': 1, 'sentence': ['Bibi', 3]}, 'Bad sentence'),
+    ({'id': 1}, 'Bad sentence'),
+    ({'id': 1, 'sentence': ['Aca'], 'timeout': '5'}, 'Bad timeout'),
+    ({'id': 1, 'sentence': ['Aca'], 'max_configs': True}, 'Bad max_configs'),
+    ({'id': 1, 'sentence': ['Aca'], 'max_stack': -1}, 'Bad max_stack'),
+])
+def test_read_request(parse_server, request_, error):
+    with pytest.raises(ValueError, match=error):
+        parse_server.read_request(request_)
+    response = handle(parse_server, request_)
+    assert response['id'] == 1 and error in response['error']
+
+
+@pytest.mark.parametrize('line', ['{"id": 1', '[1, 2]'])
+def test_bad_line(parse_server, line):
+    assert handle(parse_server, line)['error'].startswith('Bad request')
+
+
+def test_parse(parse_server, parser, input2):
+    response = handle(parse_server, {'id': 'a', 'sentence': input2, 'max_configs': 100000})
+    assert response['id'] == 'a' and response['status'] == 'complete' and response['count'] == 1
+    (config, rules), = parser.parse(input2)
+    assert response['results'] == [{'config': str(config), 'rules': [str(rule) for rule in rules]}]
+
+
+def test_count(parse_server, input1):
+    assert handle(parse_server, {'id': 2, 'sentence': input1, 'count': True}) == {
+        'id': 2, 'count': 1, 'status': 'complete'}
+    response = handle(parse_server, {'id': 3, 'sentence': input1, 'count': True, 'max_configs': 3})
+    assert response['status'] == 'max_configs'
+
+
+def test_dead_worker(parse_server, monkeypatch, input2):
+    # the worker processes are forked after the patch, and inherit it
+    monkeypatch.setattr(server, '_parse_request', crashing_parse_request)
+    assert handle(parse_server, {'id': 1, 'sentence': input2})['count'] == 1
+    assert 'BrokenProcessPool' in handle(parse_server, {'id': 2, 'sentence': ['crash']})['error']
+    assert handle(parse_server, {'id': 3, 'sentence': input2})['count'] == 1
@@ -0,0 +1,30 @@
+"""
+Checks that the statistics collector accounts for every rule the search considers.
+"""
+from lc.lc_incremental import IncrementalParser
+from lc.lc_parser import LCParser
+from lc.lc_stats import ParseStats, CONDITION, SKIPPED
+
+
+def test_every_attempt_has_an_outcome(g1, input1):
+    parser = LCParser(g1, stats=ParseStats())
+    parser.parse(input1)
+    for rule_stats in parser.stats.rules.values():
+        assert rule_stats.attempts == rule_stats.successes + sum(rule_stats.failures.values())
+    assert sum(rule_stats.failures[SKIPPED] for rule_stats in parser.stats.rules.values()) > 0
+
+
+def test_unknown_word(g1):
+    # shift has no lexical item to apply
+    parser = LCParser(g1, stats=ParseStats())
+    assert parser.parse(['Zed']) == []
+    assert parser.stats.rules['shift'].failures[CONDITION] == 1
+
+
+def test_incremental_searches(g1, input2):
+    parser = LCParser(g1, stats=ParseStats())
+    incremental = IncrementalParser(parser, check_complete=False)
+    for word in input2:
+        incremental.feed(word)
+    assert len(incremental.results()) == 1
+    assert parser.stats.searches == len(input2) + 1